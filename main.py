@@ -1,77 +1,244 @@
 # main.py
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException
 from pydantic import BaseModel
-from scripts.chat_with_kiwooming import get_ai_response
+from scripts.chat_with_kiwooming import get_ai_response, load_env
+from scripts.news_summary import NEWS_SCREENS, article_hash, build_summary_prompt, is_summary_question
+from scripts.responses import NDJSON_MEDIA_TYPE, ORJSONResponse, add_compression, ndjson_response
+from scripts.screen_cache import ScreenCache, SharedStore
+from scripts.ui_compare import ScreenCompare, compare_documents, iter_compare
+from scripts.watchlist import WatchlistScheduler, sort_candles
 import requests
 import os
+import hashlib
+import hmac
+import socket
+import threading
+from contextlib import nullcontext
 import orjson 
 
-app = FastAPI(title="Kiwooming AI Server")
+load_env()  # .env 파일 읽기 (환경변수 읽기 전에 한 번만)
+
+app = FastAPI(title="Kiwooming AI Server", default_response_class=ORJSONResponse)
+
+# COMPRESS_MIN_BYTES 이상 응답은 br(brotli-asgi 설치 시) / gzip 으로 압축
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESSION = add_compression(app, minimum_size=COMPRESS_MIN_BYTES)
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8001")
 PARSER_URL = os.getenv("PARSER_URL", "http://localhost:4001")
 COMPARE_URL = os.getenv("COMPARE_URL", "http://localhost:6002/compare")
 
-compare_cache: dict[str, dict] = {}
-backend_cache: dict[str, dict] = {}
-parser_cache: dict[str, dict] = {}
+# SCREEN_CACHE_DB 가 있으면 같은 호스트의 워커들이 sqlite(WAL) 캐시 하나를 공유
+SCREEN_CACHE_DB = os.getenv("SCREEN_CACHE_DB")
+CACHE_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+shared_store = SharedStore(SCREEN_CACHE_DB) if SCREEN_CACHE_DB else None
+
+compare_cache = ScreenCache("compare", shared_store, CACHE_OWNER)
+backend_cache = ScreenCache("backend", shared_store, CACHE_OWNER)
+parser_cache = ScreenCache("parser", shared_store, CACHE_OWNER)
+
+# 화면별 증분 compare 상태 (메모리 캐시일 때 compare_cache 값은 state.result 와 같은 객체)
+compare_states: dict[str, ScreenCompare] = {}
+
+# 조건부 요청용 validator 저장소 (url → etag / last_modified / content hash)
+fetch_validators = ScreenCache("validators", shared_store, CACHE_OWNER)
+CONDITIONAL_FETCH = os.getenv("CONDITIONAL_FETCH", "1") != "0"
+
+# refresh 사이클에서 절약한 대역폭/연산 측정용 카운터
+fetch_stats = {
+    "requests": 0,
+    "not_modified": 0,     # 304 응답
+    "same_hash": 0,        # 200이지만 본문 해시 동일 → 파싱 생략
+    "bytes_received": 0,
+    "compare_runs": 0,
+    "compare_skipped": 0,
+}
+
+
+def fetch_json_conditional(url: str, timeout: int = 30):
+    """
+    ETag / Last-Modified / 본문 해시를 이용한 조건부 GET
+
+    validator 는 여기서 저장하지 않고 돌려줌 — 호출 측이 문서를 캐시에 쓸 때 같이 저장해야
+    문서 반영이 실패했는데 validator 만 남아 이후 갱신이 계속 "변경 없음"이 되는 일이 없음
+
+    Returns:
+        (data, changed, validators) — 변경이 없으면 (None, False, validators),
+        304 이면 (None, False, None)
+    """
+    meta = fetch_validators.get(url) if CONDITIONAL_FETCH else None
+    headers = {}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    res = requests.get(url, headers=headers, timeout=timeout)
+    fetch_stats["requests"] += 1
+
+    if res.status_code == 304 and meta:
+        fetch_stats["not_modified"] += 1
+        return None, False, None
+
+    res.raise_for_status()
+    body = res.content
+    fetch_stats["bytes_received"] += len(body)
+    digest = hashlib.sha256(body).hexdigest()
+
+    validators = {
+        "etag": res.headers.get("ETag"),
+        "last_modified": res.headers.get("Last-Modified"),
+        "hash": digest,
+    }
+
+    if meta and meta.get("hash") == digest:
+        fetch_stats["same_hash"] += 1
+        return None, False, validators
+
+    return orjson.loads(body), True, validators
+
 
 def get_backend_ui(screen: str):
     screen = screen.lower()
-    if screen in backend_cache:
-        return backend_cache[screen]
 
-    print(f"🔁 [CACHE MISS] backend_ui: {screen}")
-    url = f"{BACKEND_URL}/ui/{screen}"
-    res = requests.get(url, timeout=30)
-    data = res.json()
-    backend_cache[screen] = data
-    return data
+    def fetch():
+        print(f"🔁 [CACHE MISS] backend_ui: {screen}")
+        url = f"{BACKEND_URL}/ui/{screen}"
+        fetch_validators.pop(url, None)
+        data, _, validators = fetch_json_conditional(url)
+        fetch_validators[url] = validators
+        return data
+
+    return backend_cache.get_or_fill(screen, fetch)
 
 
 def get_parser(screen: str):
     screen = screen.lower()
-    if screen in parser_cache:
-        return parser_cache[screen]
 
-    print(f"🔁 [CACHE MISS] parser: {screen}")
-    url = f"{PARSER_URL}/parse/{screen}"
-    res = requests.get(url, timeout=30)
-    data = res.json()
-    parser_cache[screen] = data
-    return data
+    def fetch():
+        print(f"🔁 [CACHE MISS] parser: {screen}")
+        url = f"{PARSER_URL}/parse/{screen}"
+        fetch_validators.pop(url, None)
+        data, _, validators = fetch_json_conditional(url)
+        fetch_validators[url] = validators
+        return data
+
+    return parser_cache.get_or_fill(screen, fetch)
+
+
+def build_compare_state(screen: str, parser_json: dict, backend_json: dict) -> ScreenCompare:
+    """캐시된 문서로 화면의 compare 상태를 새로 만듦 (네트워크 요청 없음)"""
+    state = ScreenCompare()
+    state.update(parser_json, backend_json)
+    fetch_stats["compare_runs"] += 1
+    compare_states[screen] = state
+    return state
+
+
+def sync_compare_state(screen: str) -> ScreenCompare:
+    """
+    증분 상태가 공유 캐시의 문서로 만들어진 것인지 확인하고, 아니면 그 문서로 다시 만듦
+    (공유 캐시에서는 다른 워커가 parser/backend 문서를 바꿔 둘 수 있음)
+    """
+    parser_json, backend_json = parser_cache[screen], backend_cache[screen]
+    state = compare_states.get(screen)
+    if state is None or not state.built_from(parser_json, backend_json):
+        state = build_compare_state(screen, parser_json, backend_json)
+    return state
 
 
 def get_compare(screen: str):
     screen = screen.lower()
-    if screen in compare_cache:
-        return compare_cache[screen]
 
-    print(f"🔁 [CACHE MISS] compare: {screen}")
+    def build():
+        print(f"🔁 [CACHE MISS] compare: {screen}")
+        # compare_url 로 HTTP 요청하지 말고, 이미 캐시된 문서로 직접 비교
+        return build_compare_state(screen, get_parser(screen), get_backend_ui(screen)).result
 
+    return compare_cache.get_or_fill(screen, build)
 
-    payload = {
-        "parser_url": f"{PARSER_URL}/parse/{screen}",
-        "backend_url": f"{BACKEND_URL}/ui/{screen}",
-    }
+
+def cache_transaction():
+    """backend/parser/compare 갱신을 한 번에 반영 (공유 캐시일 때만 트랜잭션)"""
+    return shared_store.transaction() if shared_store else nullcontext()
 
 
-    # compare_url 로 HTTP 요청하지 말고 함수로 직접 실행
-    data = compare_ui(CompareRequest(**payload))
-    compare_cache[screen] = data
-    return data
+def refresh_screen(screen: str, backend: bool = True, parser: bool = True) -> dict | None:
+    """
+    캐시된 화면을 조건부 요청으로 재검증
+    backend/parser 둘 다 변경이 없으면 compare 재계산을 생략하고,
+    변경이 있으면 영향받는 요소만 다시 매칭해 compare_cache 를 제자리에서 갱신한다.
+
+    Args:
+        screen: 화면 이름
+        backend: backend_ui 재검증 여부
+        parser: parser 재검증 여부
+
+    Returns:
+        변경 리포트 (ScreenCompare.update 결과) — 변경이 없으면 None
+    """
+    screen = screen.lower()
+    if screen not in backend_cache or screen not in parser_cache:
+        for cache in (backend_cache, parser_cache, compare_cache):
+            cache.pop(screen, None)
+        n = len(get_compare(screen)["elements"])
+        return {"screen": screen, "changed": [], "added": n, "removed": 0, "rematched": n}
+
+    backend_url = f"{BACKEND_URL}/ui/{screen}"
+    parser_url = f"{PARSER_URL}/parse/{screen}"
+    backend_json, backend_changed, backend_validators = None, False, None
+    parser_json, parser_changed, parser_validators = None, False, None
+    if backend:
+        backend_json, backend_changed, backend_validators = fetch_json_conditional(backend_url)
+    if parser:
+        parser_json, parser_changed, parser_validators = fetch_json_conditional(parser_url)
+
+    # 본문이 같은(same_hash) 쪽은 캐시 문서와 내용이 같으니 새 validator 를 바로 저장해도 됨
+    if backend_validators and not backend_changed:
+        fetch_validators[backend_url] = backend_validators
+    if parser_validators and not parser_changed:
+        fetch_validators[parser_url] = parser_validators
+
+    if backend and not backend_changed:
+        backend_cache.touch(screen)
+    if parser and not parser_changed:
+        parser_cache.touch(screen)
+
+    if not (backend_changed or parser_changed):
+        fetch_stats["compare_skipped"] += 1
+        compare_cache.touch(screen)
+        print(f"✅ [NOT MODIFIED] {screen}")
+        return None
+
+    with cache_transaction():
+        # 공유 문서 기준으로 맞춘 뒤 바뀐 문서만 반영 (트랜잭션 안이라 다른 워커가 끼어들지 못함)
+        state = sync_compare_state(screen)
+        if backend_changed:
+            backend_cache[screen] = backend_json
+            fetch_validators[backend_url] = backend_validators
+        if parser_changed:
+            parser_cache[screen] = parser_json
+            fetch_validators[parser_url] = parser_validators
+
+        report = state.update(parser_json, backend_json)
+        fetch_stats["compare_runs"] += 1
+        compare_cache[screen] = state.result
+    print(f"🔄 [REFRESH] {screen}: 변경 {len(report['changed'])}개, "
+          f"추가 {report['added']}개, 삭제 {report['removed']}개, 재매칭 {report['rematched']}개")
+    return report
 
 
 from datetime import datetime
 
-def get_live_chart_data():
+# 차트 화면 종목코드 (고정)
+CHART_CODE = "039490"
+
+def get_live_chart_data(code: str = CHART_CODE):
     try:
         # 오늘 날짜 YYYYMMDD
         today = datetime.now().strftime("%Y%m%d")
 
-        # 고정 종목코드
-        code = "039490"
-
         # 백엔드 차트 API URL
         url = f"{BACKEND_URL}/chart/{code}?base_dt={today}"
 
@@ -87,7 +254,8 @@ def get_live_chart_data():
 
 def compute_chart_indicators(chart_json):
     try:
-        candles = chart_json.get("stk_dt_pole_chart_qry", [])
+        # 응답 순서와 관계없이 오래된 봉 → 최신 봉 (워치리스트 스냅샷과 같은 기준)
+        candles = sort_candles(chart_json.get("stk_dt_pole_chart_qry", []))
 
         # 🔥 문자열 → 숫자 변환
         closes = [int(c["cur_prc"]) for c in candles]
@@ -118,17 +286,60 @@ def compute_chart_indicators(chart_json):
         return {}
 
 
+# 워치리스트 종목은 장중 주기적으로 미리 계산 → /chat 은 스냅샷만 읽음 (WATCHLIST_CODES="" 이면 끔)
+WATCHLIST_CODES = [c.strip() for c in os.getenv("WATCHLIST_CODES", CHART_CODE).split(",") if c.strip()]
+WATCHLIST_INTERVAL_SECONDS = float(os.getenv("WATCHLIST_INTERVAL_SECONDS", "60"))
+CHART_BUFFER_SIZE = int(os.getenv("CHART_BUFFER_SIZE", "240"))
+
+watchlist = WatchlistScheduler(
+    WATCHLIST_CODES,
+    fetch=get_live_chart_data,
+    compute=compute_chart_indicators,
+    interval=WATCHLIST_INTERVAL_SECONDS,
+    maxlen=CHART_BUFFER_SIZE,
+    # 공유 캐시면 워커 하나만 폴링하고 스냅샷은 공유 캐시로 나눔
+    shared=ScreenCache("watchlist", shared_store, CACHE_OWNER) if shared_store else None,
+)
+
 
-from dotenv import load_dotenv
-load_dotenv()  # .env 파일 읽기
 
 @app.get("/")
 def root():
     return {"message": "🚀 Kiuming AI Server Running!"}
 
+WARMER_LEASE_SECONDS = 300
+
+# 기본은 백그라운드 preload (첫 요청을 막지 않음), PRELOAD_BLOCKING=1 이면 기존처럼 기동 전에 완료
+PRELOAD_BLOCKING = os.getenv("PRELOAD_BLOCKING", "0") == "1"
+
+
 @app.on_event("startup")
+def start_preload():
+    if PRELOAD_BLOCKING:
+        preload_cache()
+    else:
+        threading.Thread(target=preload_cache, name="preload", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_watchlist():
+    if WATCHLIST_CODES:
+        watchlist.start()
+
+
+@app.on_event("shutdown")
+def stop_watchlist():
+    watchlist.stop()
+
+
 def preload_cache():
     preload_screens = ["home", "stockhome", "newsdetail", "order", "quote", "chart"]
+
+    # 공유 캐시면 워커 중 하나만 preload, 나머지는 공유 캐시를 그대로 사용
+    if shared_store and not shared_store.try_acquire("warmer", CACHE_OWNER, WARMER_LEASE_SECONDS):
+        print("🔥 다른 워커가 preload 중 → 공유 캐시 사용")
+        return
+
     print("🔥 Preloading caches...")
 
     for sc in preload_screens:
@@ -137,10 +348,51 @@ def preload_cache():
             get_parser(sc)
             get_compare(sc)
             print(f"   ✔ {sc} loaded")
+            if sc in NEWS_SCREENS:
+                # 기사 요약은 LLM 호출이라 preload 를 막지 않도록 별도 스레드
+                threading.Thread(target=warm_news_summary, args=(sc,), name="news-summary", daemon=True).start()
         except Exception as e:
             print(f"   ⚠️ preload failed ({sc}): {e}")
 
     print("🔥 Preload complete!")
+    if shared_store:
+        shared_store.release("warmer", CACHE_OWNER)
+
+# 기사 내용 해시 → 요약 (같은 기사는 한 번만 생성, 동시 첫 요청도 하나만 생성하고 나머지는 대기)
+news_summary_cache = ScreenCache("news_summary", shared_store, CACHE_OWNER)
+NEWS_SUMMARY_MAX_ENTRIES = int(os.getenv("NEWS_SUMMARY_MAX_ENTRIES", "200"))
+
+
+def prune_news_summaries(limit: int):
+    """오래된 기사 요약부터 정리"""
+    entries = news_summary_cache.stats()["screens"]
+    oldest = sorted(entries, key=lambda k: entries[k]["age_s"], reverse=True)
+    for key in oldest[:max(0, len(entries) - limit)]:
+        news_summary_cache.pop(key)
+
+
+def get_news_summary(backend_json: dict, parser_json: dict) -> str:
+    key = article_hash(backend_json, parser_json)
+
+    def generate():
+        start = time.time()
+        summary = get_ai_response(build_summary_prompt(backend_json, parser_json))
+        if summary.startswith("⚠️ 오류 발생"):
+            raise RuntimeError(summary)  # 실패 응답은 캐시하지 않음
+        prune_news_summaries(NEWS_SUMMARY_MAX_ENTRIES - 1)
+        print(f"📰 [NEWS SUMMARY] {key[:8]} 생성 ({time.time() - start:.2f}초)")
+        return summary
+
+    return news_summary_cache.get_or_fill(key, generate)
+
+
+def warm_news_summary(screen: str):
+    """뉴스 화면을 워밍/재워밍한 뒤 현재 기사 요약을 미리 생성"""
+    try:
+        get_news_summary(get_backend_ui(screen), get_parser(screen))
+    except Exception as e:
+        print(f"⚠️ news summary warm failed ({screen}): {e}")
+
 
 class ChatRequest(BaseModel):
     text: str
@@ -161,17 +413,31 @@ def chat_endpoint(req: ChatRequest):
         print(f"📍 context raw: {raw_context}, cleaned_screen: {screen}")
         backend_json   = get_backend_ui(screen)
         parser_json    = get_parser(screen)
+
+        # 규칙 7: 뉴스 화면의 기사 요약 질문은 미리 만들어 둔 요약으로 바로 응답
+        if screen in NEWS_SCREENS and is_summary_question(req.text):
+            try:
+                reply = get_news_summary(backend_json, parser_json)
+                print(f"📰 기사 요약 캐시 응답 ({time.time() - start:.2f}초)")
+                return {"reply": reply}
+            except Exception as e:
+                print(f"⚠️ 기사 요약 실패 → 일반 응답으로 진행: {e}")
+
         compare_result = get_compare(screen)
 
         chart_indicators = None
         if screen == "chart":
-            print("📈 Chart screen detected → MA 계산 시작")
-            live_chart = get_live_chart_data()
-            if live_chart:
-                chart_indicators = compute_chart_indicators(live_chart)
-                print("📊 MA 계산 완료")
+            chart_indicators = watchlist.snapshot(CHART_CODE)
+            if chart_indicators:
+                print("📊 워치리스트 스냅샷 사용")
             else:
-                print("⚠️ live_chart is None (백엔드 응답 없음)")
+                print("📈 Chart screen detected → MA 계산 시작")
+                live_chart = get_live_chart_data()
+                if live_chart:
+                    chart_indicators = compute_chart_indicators(live_chart)
+                    print("📊 MA 계산 완료")
+                else:
+                    print("⚠️ live_chart is None (백엔드 응답 없음)")
 
         chart_block = ""
         if chart_indicators:
@@ -291,9 +557,10 @@ def chat_endpoint(req: ChatRequest):
 class CompareRequest(BaseModel):
     parser_url: str  
     backend_url: str
+    stream: bool = False   # True 또는 Accept: application/x-ndjson 이면 NDJSON 스트리밍
 
 @app.post("/compare")
-def compare_ui(req: CompareRequest):
+def compare_ui(req: CompareRequest, accept: str | None = Header(default=None)):
     try:
         parser_res = requests.get(req.parser_url)
         parser_json = parser_res.json()
@@ -301,29 +568,106 @@ def compare_ui(req: CompareRequest):
         backend_res = requests.get(req.backend_url)
         backend_json = backend_res.json()
 
-        results = []
-        parser_elements = parser_json.get("elements", [])
-        backend_components = backend_json.get("components", [])
-
-        for el in parser_elements:
-            matched_desc = None
-            for comp in backend_components:
-                for be in comp.get("elements", []):
-                    if be["element_label"].lower() in el.get("tag", "").lower():
-                        matched_desc = be["description"]
-                        break
-                if matched_desc:
-                    break
-            results.append({
-                "tag": el.get("tag"),
-                "attrs": el.get("attrs"),
-                "description": matched_desc or "설명 없음"
-            })
-
-        return {"screen": parser_json.get("screen"), "elements": results}
+        if req.stream or NDJSON_MEDIA_TYPE in (accept or ""):
+            # 첫 줄은 화면 정보, 이후 매칭된 요소를 한 줄씩
+            def lines():
+                yield {"screen": parser_json.get("screen")}
+                yield from iter_compare(parser_json, backend_json)
+            return ndjson_response(lines())
+
+        # 직접 반환해서 jsonable_encoder 를 거치지 않음
+        return ORJSONResponse(compare_documents(parser_json, backend_json))
     except Exception as e:
         return {"error": str(e)}
 
+CACHE_NAMES = ("backend", "parser", "compare")
+CACHE_ADMIN_TOKEN = os.getenv("CACHE_ADMIN_TOKEN")
+
+# 같은 화면의 재워밍이 동시에 돌지 않도록 화면별 락
+_rewarm_locks: dict[str, threading.Lock] = {}
+_rewarm_locks_guard = threading.Lock()
+
+
+def rewarm_screen(screen: str, caches: tuple[str, ...] = CACHE_NAMES):
+    """
+    무효화된 화면을 백그라운드에서 다시 채움
+    기존 항목은 새 데이터가 준비될 때까지 그대로 응답에 쓰인다 (콜드 캐시 방지).
+    """
+    with _rewarm_locks_guard:
+        lock = _rewarm_locks.setdefault(screen, threading.Lock())
+
+    with lock:
+        try:
+            start = time.time()
+            if "backend" in caches or "parser" in caches:
+                refresh_screen(screen, backend="backend" in caches, parser="parser" in caches)
+            elif screen in backend_cache and screen in parser_cache:
+                # compare만 무효화 → 캐시된 문서로 전체 재계산 후 교체
+                state = build_compare_state(screen, parser_cache[screen], backend_cache[screen])
+                compare_cache[screen] = state.result
+            else:
+                get_compare(screen)
+            print(f"♻️ [REWARM] {screen} {list(caches)} ({time.time() - start:.2f}초)")
+        except Exception as e:
+            print(f"⚠️ rewarm failed ({screen}): {e}")
+            return
+
+    # 기사가 바뀌었으면 새 요약 생성 (그대로면 캐시 히트)
+    if screen in NEWS_SCREENS and ("backend" in caches or "parser" in caches):
+        warm_news_summary(screen)
+
+
+def check_cache_token(authorization: str | None):
+    if not CACHE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="CACHE_ADMIN_TOKEN이 설정되지 않았습니다.")
+    token = (authorization or "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(token, CACHE_ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="invalid cache token")
+
+
+class InvalidateRequest(BaseModel):
+    screens: list[str] | None = None   # None이면 캐시된 모든 화면
+    caches: list[str] | None = None    # backend / parser / compare, None이면 전체
+
+
+@app.post("/cache/invalidate", status_code=202)
+def invalidate_cache(
+    req: InvalidateRequest,
+    background_tasks: BackgroundTasks,
+    authorization: str | None = Header(default=None),
+):
+    check_cache_token(authorization)
+
+    caches = tuple(req.caches or CACHE_NAMES)
+    unknown = [c for c in caches if c not in CACHE_NAMES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown caches: {unknown}")
+
+    if req.screens:
+        screens = sorted({sc.strip("/").lower() for sc in req.screens})
+    else:
+        screens = sorted(set(backend_cache.keys()) | set(parser_cache.keys()) | set(compare_cache.keys()))
+
+    for sc in screens:
+        background_tasks.add_task(rewarm_screen, sc, caches)
+
+    print(f"🧹 [INVALIDATE] screens={screens} caches={list(caches)}")
+    return {"scheduled": screens, "caches": list(caches)}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "backend": backend_cache.stats(),
+        "parser": parser_cache.stats(),
+        "compare": compare_cache.stats(),
+        "news_summary": news_summary_cache.stats(),
+        "watchlist": watchlist.stats(),
+        "fetch": dict(fetch_stats),
+        "compression": {"method": COMPRESSION, "min_bytes": COMPRESS_MIN_BYTES},
+    }
+
+
 # # ✅ compare 결과를 요약해주는 함수
 # def summarize_ui(compare_result: dict) -> str:
 #     elements = compare_result.get("elements", [])
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+키우ME 파인튜닝 데이터셋 분석 스크립트
+make_kiwume_jsonl.py 로 만든 JSONL을 업로드 전에 한 번에 훑어서
+중복을 걸러내고 학습 토큰 수와 예상 비용을 계산합니다.
+
+    - 완전 중복 제거: (user, assistant) 원문이 글자 하나까지 같은 예제
+    - 유사 중복 클러스터링: user 메시지의 글자 3-gram MinHash + LSH 밴딩
+      (문장부호·공백만 다른 예제도 여기서 걸러짐)
+    - 예제별 / 전체 토큰 수 (tiktoken 이 있으면 실제 토크나이저, 없으면 근사치)
+    - 예상 학습 비용 = 토큰 수 × epoch 수 × 100만 토큰당 가격
+
+입력을 한 번만 읽고, 메모리는 남긴 예제 수에 비례합니다 (남긴 예제당 약 1KB).
+파싱·토큰 계산·MinHash 는 청크 단위로 워커 프로세스에서, 중복 판정은 입력 순서대로 메인 프로세스에서 합니다.
+
+KIWUME: 중복 제거 + 토큰 계산 스크립트
+
+사용 예:
+    python scripts/analyze_kiwume_dataset.py
+    python scripts/analyze_kiwume_dataset.py --input data/kiwume_train.jsonl --threshold 0.8 --epochs 3
+    python scripts/analyze_kiwume_dataset.py --workers 8 --chunk-size 2000
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+import zlib
+from array import array
+from collections import deque
+from pathlib import Path
+
+import orjson
+
+try:
+    from scripts.kiwume_tokens import count_message_tokens, is_exact
+except ImportError:  # scripts/ 에서 직접 실행할 때
+    from kiwume_tokens import count_message_tokens, is_exact
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+NUM_PERM = 64
+BANDS = 16                      # 16 밴드 × 4 행 → 유사도 약 0.5 이상이면 후보
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MASK64 = (1 << 64) - 1
+
+# gpt-4o-mini 파인튜닝 학습 가격 (USD / 100만 토큰), --price 로 변경
+DEFAULT_PRICE_PER_1M = 3.0
+MAX_EXAMPLE_TOKENS = 65536
+DEFAULT_CHUNK_SIZE = 2000
+
+_NORMALIZE_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _make_permutations(seed: int = 42) -> list[tuple[int, int]]:
+    """multiply-shift 해시 계수 (a는 홀수)"""
+    perms = []
+    state = seed
+    for _ in range(NUM_PERM):
+        a = int.from_bytes(hashlib.blake2b(f"a{state}".encode(), digest_size=8).digest(), "big") | 1
+        b = int.from_bytes(hashlib.blake2b(f"b{state}".encode(), digest_size=8).digest(), "big")
+        perms.append((a, b))
+        state += 1
+    return perms
+
+
+PERMUTATIONS = _make_permutations()
+
+
+def normalize(text: str) -> str:
+    """공백·문장부호 제거 + 소문자화"""
+    return _NORMALIZE_RE.sub("", text).lower()
+
+
+def minhash(text: str) -> list[int]:
+    """글자 n-gram MinHash 시그니처 (32비트 값 NUM_PERM개)"""
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {zlib.crc32(text.encode("utf-8"))}
+    else:
+        shingles = {
+            zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+            for i in range(len(text) - SHINGLE_SIZE + 1)
+        }
+    return [min(((a * h + b) & MASK64) >> 32 for h in shingles) for a, b in PERMUTATIONS]
+
+
+def band_keys(signature: list[int]) -> list[int]:
+    """밴드별 LSH 버킷 키 (밴드 번호 포함)"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        keys.append(hash((band, *chunk)))
+    return keys
+
+
+def estimated_jaccard(packed: bytes, signature: list[int]) -> float:
+    """저장된 시그니처(uint32 bytes)와의 MinHash 유사도"""
+    stored = array("I")
+    stored.frombytes(packed)
+    return sum(1 for x, y in zip(stored, signature) if x == y) / NUM_PERM
+
+
+def process_chunk(args) -> list:
+    """
+    청크 하나를 파싱 + 토큰 계산 + MinHash (워커 프로세스에서 실행)
+
+    Returns:
+        행마다 (user, 토큰 수, 완전 중복 키, 시그니처 bytes, LSH 키) — 형식 오류 행은 None
+    """
+    lines, model = args
+    results = []
+    for line in lines:
+        try:
+            messages = orjson.loads(line)["messages"]
+            user = next(m["content"] for m in messages if m["role"] == "user")
+            assistant = next(m["content"] for m in messages if m["role"] == "assistant")
+        except (orjson.JSONDecodeError, KeyError, StopIteration, TypeError):
+            results.append(None)
+            continue
+
+        # 완전 중복은 원문 그대로 비교 (정규화하면 문장부호만 다른 예제까지 완전 중복으로 잡힘)
+        exact_key = hashlib.blake2b(f"{user}\x00{assistant}".encode("utf-8"), digest_size=12).digest()
+        signature = minhash(user)
+        results.append((
+            user,
+            count_message_tokens(messages, model),
+            exact_key,
+            array("I", signature).tobytes(),
+            band_keys(signature),
+        ))
+    return results
+
+
+def iter_line_chunks(fin, chunk_size: int):
+    """(첫 줄 번호, 빈 줄을 뺀 줄 목록) 을 chunk_size 줄 단위로"""
+    chunk, first = [], 1
+    for line_no, line in enumerate(fin, start=1):
+        if not chunk:
+            first = line_no
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield first, chunk
+            chunk = []
+    if chunk:
+        yield first, chunk
+
+
+def percentile(sorted_values: list[int], q: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def analyze_dataset(
+    input_jsonl: str,
+    output_jsonl: str,
+    report_path: str,
+    threshold: float = 0.8,
+    drop_near_duplicates: bool = True,
+    model: str = "gpt-4o-mini",
+    epochs: int = 3,
+    price_per_1m: float = DEFAULT_PRICE_PER_1M,
+    token_counts_path: str | None = None,
+    top_clusters: int = 20,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> dict:
+    """
+    JSONL 데이터셋을 한 번 읽으며 중복 제거 + 토큰 계산
+
+    Args:
+        input_jsonl: 입력 JSONL (messages 형식)
+        output_jsonl: 중복을 제거한 JSONL
+        report_path: 리포트 JSON 경로
+        threshold: 유사 중복으로 볼 user 메시지 MinHash 유사도
+        drop_near_duplicates: False면 유사 중복을 리포트만 하고 남김
+        model: 토큰 계산 기준 모델
+        epochs: 예상 학습 epoch 수
+        price_per_1m: 100만 학습 토큰당 가격 (USD)
+        token_counts_path: 예제별 토큰 수 TSV 경로 (선택)
+        top_clusters: 리포트에 담을 큰 클러스터 수
+        chunk_size: 워커에 넘기는 줄 묶음 크기
+        workers: 파싱/MinHash 프로세스 수 (1이면 현재 프로세스에서 처리)
+
+    Returns:
+        리포트 dict
+    """
+    exact_seen: set[bytes] = set()
+    buckets: dict[int, int] = {}          # LSH 버킷 → 대표 예제 번호
+    signatures: dict[int, bytes] = {}     # 대표 예제 번호 → 시그니처 (uint32 × NUM_PERM)
+    representatives: dict[int, str] = {}  # 대표 예제 번호 → user 메시지 앞부분
+    cluster_sizes: dict[int, int] = {}
+    cluster_samples: dict[int, list[str]] = {}
+
+    stats = {"rows": 0, "invalid": 0, "exact_duplicates": 0, "near_duplicates": 0, "kept": 0}
+    tokens_all: list[int] = []
+    tokens_kept: list[int] = []
+    over_limit = 0
+
+    start = time.perf_counter()
+    token_file = open(token_counts_path, "w", encoding="utf-8") if token_counts_path else None
+    if token_file:
+        token_file.write("line\ttokens\tstatus\n")
+
+    def consume(first_line_no: int, lines: list[bytes], results: list):
+        nonlocal over_limit
+        for line_no, line, result in zip(range(first_line_no, first_line_no + len(lines)), lines, results):
+            if not line.strip():
+                continue
+            stats["rows"] += 1
+            if result is None:
+                stats["invalid"] += 1
+                continue
+            user, n_tokens, exact_key, packed, keys = result
+            tokens_all.append(n_tokens)
+            if n_tokens > MAX_EXAMPLE_TOKENS:
+                over_limit += 1
+
+            # 1) 완전 중복
+            if exact_key in exact_seen:
+                stats["exact_duplicates"] += 1
+                if token_file:
+                    token_file.write(f"{line_no}\t{n_tokens}\texact_duplicate\n")
+                continue
+            exact_seen.add(exact_key)
+
+            # 2) 유사 중복 (user 메시지 기준, 입력 순서대로 첫 예제가 대표)
+            signature = array("I")
+            signature.frombytes(packed)
+            rep = None
+            for key in keys:
+                candidate = buckets.get(key)
+                if candidate is not None and estimated_jaccard(signatures[candidate], signature) >= threshold:
+                    rep = candidate
+                    break
+
+            status = "kept"
+            if rep is not None:
+                stats["near_duplicates"] += 1
+                cluster_sizes[rep] = cluster_sizes.get(rep, 1) + 1
+                samples = cluster_samples.setdefault(rep, [])
+                if len(samples) < 3:
+                    samples.append(user)
+                if drop_near_duplicates:
+                    status = "near_duplicate"
+            else:
+                for key in keys:
+                    buckets.setdefault(key, line_no)
+                signatures[line_no] = packed
+                representatives[line_no] = user[:60]
+
+            if token_file:
+                token_file.write(f"{line_no}\t{n_tokens}\t{status}\n")
+            if status == "kept":
+                stats["kept"] += 1
+                tokens_kept.append(n_tokens)
+                fout.write(line if line.endswith(b"\n") else line + b"\n")
+
+    with open(input_jsonl, "rb") as fin, open(output_jsonl, "wb") as fout:
+        # 빈 줄도 워커에 넘겨 줄 번호를 맞추고, 결과는 consume 에서 건너뜀
+        chunks = ((first, lines, (lines, model)) for first, lines in iter_line_chunks(fin, chunk_size))
+        if workers <= 1:
+            for first, lines, task in chunks:
+                consume(first, lines, process_chunk(task))
+        else:
+            # 진행 중인 청크 수를 제한해 입력 크기와 무관하게 메모리 일정 유지
+            with mp.Pool(workers) as pool:
+                pending = deque()
+                for first, lines, task in chunks:
+                    pending.append((first, lines, pool.apply_async(process_chunk, (task,))))
+                    if len(pending) >= workers * 2:
+                        first, lines, result = pending.popleft()
+                        consume(first, lines, result.get())
+                while pending:
+                    first, lines, result = pending.popleft()
+                    consume(first, lines, result.get())
+
+    if token_file:
+        token_file.close()
+
+    elapsed = time.perf_counter() - start
+
+    def token_summary(values: list[int]) -> dict:
+        total = sum(values)
+        ordered = sorted(values)
+        return {
+            "examples": len(values),
+            "total": total,
+            "mean": round(total / len(values), 1) if values else 0,
+            "p50": percentile(ordered, 0.5),
+            "p95": percentile(ordered, 0.95),
+            "max": ordered[-1] if ordered else 0,
+            "estimated_cost_usd": round(total * epochs * price_per_1m / 1_000_000, 4),
+        }
+
+    biggest = sorted(cluster_sizes.items(), key=lambda x: -x[1])[:top_clusters]
+    report = {
+        "input": str(input_jsonl),
+        "output": str(output_jsonl),
+        **stats,
+        "near_duplicate_clusters": len(cluster_sizes),
+        "threshold": threshold,
+        "tokenizer": "tiktoken" if is_exact(model) else "approximate",
+        "model": model,
+        "epochs": epochs,
+        "price_per_1m_tokens": price_per_1m,
+        "examples_over_token_limit": over_limit,
+        "tokens_before": token_summary(tokens_all),
+        "tokens_after": token_summary(tokens_kept),
+        "top_clusters": [
+            {"representative": representatives.get(rep, ""), "size": size, "samples": cluster_samples.get(rep, [])}
+            for rep, size in biggest
+        ],
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(stats["rows"] / elapsed) if elapsed > 0 else 0,
+    }
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    before, after = report["tokens_before"], report["tokens_after"]
+    print(f"[OK] 분석 완료! ({report['rows_per_sec']:,} rows/s)")
+    print(f"   입력: {input_jsonl} ({stats['rows']}행, 오류 {stats['invalid']}행)")
+    print(f"   완전 중복: {stats['exact_duplicates']}개, 유사 중복: {stats['near_duplicates']}개 "
+          f"({len(cluster_sizes)}개 클러스터)")
+    print(f"   남은 예제: {stats['kept']}개 → {output_jsonl}")
+    print(f"   토큰 ({report['tokenizer']}): {before['total']:,} → {after['total']:,}")
+    print(f"   예상 학습 비용 ({epochs} epochs): ${before['estimated_cost_usd']:.2f} → ${after['estimated_cost_usd']:.2f}")
+    if over_limit:
+        print(f"   [WARN] 토큰 한도({MAX_EXAMPLE_TOKENS}) 초과 예제: {over_limit}개")
+    print(f"   리포트: {report_path}")
+
+    return report
+
+
+def main():
+    """메인 실행 함수"""
+
+    # KIWUME: 프로젝트 루트 기준 경로 설정
+    project_root = Path(__file__).parent.parent
+
+    parser = argparse.ArgumentParser(description="키우ME 데이터셋 중복 제거 + 토큰 분석")
+    parser.add_argument("--input", type=Path, default=project_root / "data" / "kiwume_train.jsonl")
+    parser.add_argument("--output", type=Path, default=project_root / "data" / "kiwume_train_dedup.jsonl")
+    parser.add_argument("--report", type=Path, default=project_root / "data" / "kiwume_dedup_report.json")
+    parser.add_argument("--token-counts", type=Path, default=None, help="예제별 토큰 수 TSV 출력 경로")
+    parser.add_argument("--threshold", type=float, default=0.8, help="유사 중복 MinHash 유사도 기준")
+    parser.add_argument("--keep-near-duplicates", action="store_true", help="유사 중복은 리포트만 하고 남김")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--price", type=float, default=DEFAULT_PRICE_PER_1M, help="100만 학습 토큰당 USD")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"[ERROR] 입력 파일을 찾을 수 없습니다 - {args.input}")
+        print("        먼저 python scripts/make_kiwume_jsonl.py 를 실행하세요.")
+        return
+
+    analyze_dataset(
+        str(args.input),
+        str(args.output),
+        str(args.report),
+        threshold=args.threshold,
+        drop_near_duplicates=not args.keep_near_duplicates,
+        model=args.model,
+        epochs=args.epochs,
+        price_per_1m=args.price,
+        token_counts_path=str(args.token_counts) if args.token_counts else None,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+응답 인코딩 / 압축 벤치마크
+/compare 결과를 기존 방식(jsonable_encoder + JSONResponse)과 ORJSONResponse 로 직렬화하는 시간,
+그리고 identity / gzip / br / NDJSON 스트리밍별 실제 전송 바이트를 화면 크기별로 비교합니다.
+
+KIWUME: 스텁 서버를 스레드로 띄워 main 앱을 TestClient 로 호출하므로 별도 서버가 필요 없습니다.
+
+사용 예:
+    python scripts/bench_encoding.py
+    python scripts/bench_encoding.py --repeat 50 --sizes 8x12 40x50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+import orjson
+
+from scripts.responses import ORJSONResponse
+from scripts.stub_ui_server import StubStore, make_backend_doc, make_handler, make_parser_doc
+from scripts.ui_compare import compare_documents
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+def median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def wire_bytes(client: TestClient, body: dict, headers: dict) -> tuple[int, str, float]:
+    """(전송 바이트, Content-Encoding, 응답 시간 ms)"""
+    start = time.perf_counter()
+    res = client.post("/compare", json=body, headers=headers)
+    res.raise_for_status()
+    elapsed = (time.perf_counter() - start) * 1000
+    return res.num_bytes_downloaded, res.headers.get("content-encoding", "identity"), elapsed
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="응답 인코딩 / 압축 벤치마크")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", nargs="+", default=["8x12", "20x25", "40x50"],
+                        help="<component 수>x<component당 요소 수>")
+    args = parser.parse_args()
+
+    store = StubStore()
+    for size in args.sizes:
+        n_comp, n_el = map(int, size.split("x"))
+        store.put(f"/ui/bench{size}", make_backend_doc(f"bench{size}", n_comp, n_el))
+        store.put(f"/parse/bench{size}", make_parser_doc(f"bench{size}", n_comp, n_el))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(store))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    os.environ.setdefault("WATCHLIST_CODES", "")
+    os.environ["PRELOAD_BLOCKING"] = "1"  # 측정 중 preload 가 끼어들지 않도록
+    os.environ["BACKEND_URL"] = url
+    os.environ["PARSER_URL"] = url
+    import main as server_main
+
+    print("=" * 80)
+    print(f"응답 인코딩 벤치마크 (압축: {server_main.COMPRESSION}, 최소 {server_main.COMPRESS_MIN_BYTES} bytes)")
+    print("=" * 80)
+
+    with TestClient(server_main.app) as client:
+        for size in args.sizes:
+            screen = f"bench{size}"
+            backend_json = store.get(f"/ui/{screen}")["doc"]
+            parser_json = store.get(f"/parse/{screen}")["doc"]
+            result = compare_documents(parser_json, backend_json)
+            body = {"parser_url": f"{url}/parse/{screen}", "backend_url": f"{url}/ui/{screen}"}
+
+            baseline_ms = median_ms(lambda: JSONResponse(jsonable_encoder(result)), args.repeat)
+            orjson_ms = median_ms(lambda: ORJSONResponse(result), args.repeat)
+            baseline_bytes = len(JSONResponse(jsonable_encoder(result)).body)
+            chat_ms = median_ms(
+                lambda: [orjson.dumps(d).decode() for d in (backend_json, parser_json, result)], args.repeat)
+
+            print(f"\n[{screen}] 요소 {len(result['elements']):,}개")
+            print("-" * 80)
+            print(f"   직렬화  기존 jsonable_encoder + JSONResponse : {baseline_ms:8.2f}ms")
+            print(f"   직렬화  ORJSONResponse                      : {orjson_ms:8.2f}ms "
+                  f"(x{baseline_ms / max(orjson_ms, 1e-6):.1f})")
+            print(f"   /chat 프롬프트용 orjson 인코딩 (3개 문서)     : {chat_ms:8.2f}ms")
+            print(f"   전송    기존 (압축 없음)                     : {baseline_bytes:>10,} bytes")
+
+            modes = [
+                ("identity", {"Accept-Encoding": "identity"}, body),
+                ("gzip", {"Accept-Encoding": "gzip"}, body),
+                ("br", {"Accept-Encoding": "br, gzip"}, body),
+                ("ndjson+gzip", {"Accept-Encoding": "gzip"}, {**body, "stream": True}),
+            ]
+            for name, headers, req_body in modes:
+                n_bytes, encoding, elapsed = wire_bytes(client, req_body, headers)
+                print(f"   전송    {name:<12} → {encoding:<8}         : {n_bytes:>10,} bytes "
+                      f"({n_bytes / baseline_bytes:6.1%}, {elapsed:.0f}ms)")
+
+    server.shutdown()
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
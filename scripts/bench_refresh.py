@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+캐시 refresh 사이클 벤치마크
+조건부 요청(ETag / 해시) 사용 여부에 따른 전송 바이트와 CPU 시간을 비교합니다.
+
+KIWUME: 스텁 서버(scripts/stub_ui_server.py)를 먼저 실행해야 합니다.
+
+사용 예:
+    python scripts/stub_ui_server.py --port 8001 &
+    python scripts/bench_refresh.py --url http://localhost:8001 --cycles 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+def run_cycles(url: str, conditional: bool, cycles: int, touch_every: int) -> dict:
+    """main 모듈을 새로 import해 refresh 사이클을 돌리고 통계를 반환"""
+    os.environ["BACKEND_URL"] = url
+    os.environ["PARSER_URL"] = url
+    os.environ["CONDITIONAL_FETCH"] = "1" if conditional else "0"
+
+    sys.modules.pop("main", None)
+    import main
+
+    screens = ["home", "stockhome", "newsdetail", "order", "quote", "chart"]
+    for sc in screens:
+        main.get_compare(sc)
+
+    requests.post(f"{url}/__stats/reset", timeout=5)
+    for k in main.fetch_stats:
+        main.fetch_stats[k] = 0
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(cycles):
+        if touch_every and i % touch_every == 0:
+            requests.post(f"{url}/__touch/{screens[i % len(screens)]}", timeout=5)
+        for sc in screens:
+            main.refresh_screen(sc)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    upstream = requests.get(f"{url}/__stats", timeout=5).json()
+    return {
+        "cpu_s": cpu,
+        "wall_s": wall,
+        "bytes_sent": upstream["bytes_sent"],
+        "not_modified": upstream["not_modified"],
+        **main.fetch_stats,
+    }
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="refresh 사이클 벤치마크")
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--touch-every", type=int, default=5,
+                        help="N 사이클마다 화면 하나를 변경 (0이면 변경 없음)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    print("=" * 80)
+    print(f"refresh 벤치마크: cycles={args.cycles}, touch_every={args.touch_every}")
+    print("=" * 80)
+
+    results = {}
+    for conditional in (False, True):
+        label = "conditional" if conditional else "full"
+        results[label] = run_cycles(args.url, conditional, args.cycles, args.touch_every)
+
+    print(f"{'mode':<12} {'bytes':>12} {'304':>6} {'same_hash':>10} {'compare':>8} {'skipped':>8} {'cpu(s)':>8} {'wall(s)':>8}")
+    for label, r in results.items():
+        print(f"{label:<12} {r['bytes_sent']:>12,} {r['not_modified']:>6} {r['same_hash']:>10} "
+              f"{r['compare_runs']:>8} {r['compare_skipped']:>8} {r['cpu_s']:>8.3f} {r['wall_s']:>8.3f}")
+
+    full, cond = results["full"], results["conditional"]
+    if full["bytes_sent"]:
+        saved = 1 - cond["bytes_sent"] / full["bytes_sent"]
+        print(f"\n[RESULT] 전송 바이트 {saved:.1%} 절감, "
+              f"CPU {full['cpu_s'] - cond['cpu_s']:.3f}s 절감")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+멀티 워커 캐시 벤치마크
+워커별 메모리 캐시와 sqlite 공유 캐시(SCREEN_CACHE_DB)의 메모리 사용량과
+upstream 호출 수를 워커 1 / 4 / 8 개에서 비교합니다.
+
+KIWUME: 스텁 서버(scripts/stub_ui_server.py)를 자동으로 띄워서 측정합니다.
+
+사용 예:
+    python scripts/bench_workers.py --workers 1 4 8 --reads 200
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCREENS = ["home", "stockhome", "newsdetail", "order", "quote", "chart"]
+
+
+def rss_kb() -> int:
+    """현재 프로세스 RSS (KB, Linux /proc 기준)"""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def worker(env: dict, reads: int, start_event, queue):
+    """uvicorn 워커 하나를 흉내: preload 후 /chat 경로의 캐시 조회 반복"""
+    os.environ.update(env)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import main
+
+    base_rss = rss_kb()
+    start_event.wait()
+
+    main.preload_cache()
+    for i in range(reads):
+        sc = SCREENS[i % len(SCREENS)]
+        main.get_backend_ui(sc)
+        main.get_parser(sc)
+        main.get_compare(sc)
+
+    queue.put({"rss_delta_kb": rss_kb() - base_rss, "fetches": main.fetch_stats["requests"]})
+
+
+def run(n_workers: int, shared: bool, url: str, reads: int) -> dict:
+    requests.post(f"{url}/__stats/reset", timeout=5)
+
+    env = {"BACKEND_URL": url, "PARSER_URL": url}
+    tmpdir = tempfile.TemporaryDirectory()
+    if shared:
+        env["SCREEN_CACHE_DB"] = os.path.join(tmpdir.name, "screen_cache.db")
+
+    ctx = mp.get_context("spawn")
+    start_event = ctx.Event()
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(env, reads, start_event, queue)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+
+    # 모든 워커가 import를 마친 뒤 동시에 시작
+    time.sleep(2.0)
+    wall_start = time.perf_counter()
+    start_event.set()
+    results = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - wall_start
+
+    upstream = requests.get(f"{url}/__stats", timeout=5).json()
+    tmpdir.cleanup()
+    return {
+        "upstream_requests": upstream["requests"],
+        "upstream_bytes": upstream["bytes_sent"],
+        "rss_total_kb": sum(r["rss_delta_kb"] for r in results),
+        "wall_s": wall,
+    }
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="멀티 워커 캐시 벤치마크")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--reads", type=int, default=200, help="워커당 화면 조회 횟수")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    stub = subprocess.Popen(
+        [sys.executable, str(PROJECT_ROOT / "scripts" / "stub_ui_server.py"), "--port", str(args.port)],
+        stdout=subprocess.DEVNULL,
+    )
+    time.sleep(1.0)
+
+    try:
+        print("=" * 80)
+        print(f"{'workers':>7} {'cache':<7} {'upstream req':>12} {'upstream bytes':>15} {'RSS Δ(KB)':>10} {'wall(s)':>8}")
+        print("-" * 80)
+        for n in args.workers:
+            for shared in (False, True):
+                r = run(n, shared, url, args.reads)
+                print(f"{n:>7} {'shared' if shared else 'local':<7} {r['upstream_requests']:>12} "
+                      f"{r['upstream_bytes']:>15,} {r['rss_total_kb']:>10,} {r['wall_s']:>8.2f}")
+        print("=" * 80)
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
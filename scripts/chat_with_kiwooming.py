@@ -4,6 +4,9 @@
 키우밍 대화 챗봇
 파인튜닝된 키우밍 모델과 실시간으로 대화합니다.
 
+대화 기록은 토큰 예산(KIWOOMING_HISTORY_TOKENS) 안에서 최근 대화만 그대로 보내고,
+예산을 넘는 오래된 대화는 요약 한 덩어리로 접어서 보냅니다. 대화가 길어져도 턴당 비용이 일정합니다.
+
 KIWUME: 키우밍 인터랙티브 챗봇
 """
 
@@ -11,11 +14,41 @@ KIWUME: 키우밍 인터랙티브 챗봇
 import json
 import os
 import sys
+import time
+from functools import lru_cache
 from pathlib import Path
-from openai import OpenAI
+from typing import TYPE_CHECKING
+
+try:
+    from scripts.kiwume_tokens import count_message_tokens
+except ImportError:  # scripts/ 에서 직접 실행할 때
+    from kiwume_tokens import count_message_tokens
+
+# KIWUME: openai SDK는 import가 무거워서 실제 호출 시점에 로드 (서버 콜드 스타트 단축)
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+_env_loaded = False
+
 
-from dotenv import load_dotenv
-load_dotenv()  # .env 파일 읽기
+def load_env():
+    """.env 파일을 한 번만 읽기"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()  # .env 파일 읽기
+        _env_loaded = True
+
+
+@lru_cache(maxsize=4)
+def get_client(api_key: str) -> "OpenAI":
+    """OpenAI 클라이언트를 처음 쓸 때 만들고 재사용"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
+DEFAULT_HISTORY_TOKENS = 1500
+SUMMARY_MAX_TOKENS = 200
 
 
 # KIWUME: Windows 콘솔 한글 출력 설정
@@ -27,6 +60,7 @@ if sys.platform == 'win32':
 
 def load_config():
     """환경변수에서 설정 로드 (Render 배포용)"""
+    load_env()
     config = {
         "openai_api_key": os.getenv("OPENAI_API_KEY"),
         "kiwume_model_id": os.getenv("KIWUME_MODEL_ID"),
@@ -34,6 +68,8 @@ def load_config():
             "KIWOOMING_SYSTEM_PROMPT",
             "당신은 키움증권 MTS 내 AI 반려 챗봇 키우밍입니다. 화면 구조를 바탕으로 맥락을 이해하고 답하세요."
         ),
+        # CLI 대화에서 한 번에 보낼 대화 기록의 최대 토큰 수
+        "history_tokens": int(os.getenv("KIWOOMING_HISTORY_TOKENS", DEFAULT_HISTORY_TOKENS)),
     }
 
     if not config["openai_api_key"]:
@@ -43,7 +79,118 @@ def load_config():
 
     return config
 
-def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
+
+def build_messages(system_prompt: str, summary: str, turns: list[dict]) -> list[dict]:
+    """시스템 프롬프트 + (이전 대화 요약) + 최근 대화"""
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": f"[이전 대화 요약]\n{summary}"})
+    return messages + turns
+
+
+def summarize_turns(client: "OpenAI", model_id: str, summary: str, old_turns: list[dict]) -> tuple[str, dict]:
+    """
+    기존 요약에 밀려난 대화를 합쳐 새 요약 생성
+
+    Returns:
+        (새 요약, {"prompt_tokens", "completion_tokens"})
+    """
+    transcript = "\n".join(
+        f"{'사용자' if t['role'] == 'user' else '키우밍'}: {t['content']}" for t in old_turns
+    )
+    messages = [
+        {"role": "system", "content": "다음 대화를 이후 상담에 필요한 사실(보유 종목, 고민, 이미 안내한 내용) 위주로 5줄 이내 한국어로 요약하라."},
+        {"role": "user", "content": f"[기존 요약]\n{summary or '없음'}\n\n[추가 대화]\n{transcript}"},
+    ]
+    response = client.chat.completions.create(
+        model=model_id,
+        messages=messages,
+        temperature=0.2,
+        max_tokens=SUMMARY_MAX_TOKENS,
+    )
+    new_summary = (response.choices[0].message.content or "").strip()
+    usage = response.usage
+    return new_summary, {
+        "prompt_tokens": usage.prompt_tokens if usage else count_message_tokens(messages),
+        "completion_tokens": usage.completion_tokens if usage else count_message_tokens(
+            [{"role": "assistant", "content": new_summary}]),
+    }
+
+
+def fit_history(client: "OpenAI", model_id: str, system_prompt: str, summary: str, turns: list[dict],
+                budget: int) -> tuple[str, list[dict], dict]:
+    """
+    보낼 메시지가 토큰 예산을 넘으면 오래된 대화를 요약으로 접기
+    (한 번에 절반씩 접어서 요약 호출이 매 턴 일어나지 않게 함)
+
+    Returns:
+        (새 요약, 남은 최근 대화, 요약 호출 사용량 {"calls", "seconds", "prompt_tokens", "completion_tokens"})
+    """
+    usage = {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+    while len(turns) > 1 and count_message_tokens(build_messages(system_prompt, summary, turns)) > budget:
+        # user/assistant 쌍 단위로, 마지막 user 메시지는 남김
+        cut = max(2, (len(turns) // 2) // 2 * 2)
+        cut = min(cut, len(turns) - 1)
+        old_turns, turns = turns[:cut], turns[cut:]
+        start = time.perf_counter()
+        try:
+            summary, call_usage = summarize_turns(client, model_id, summary, old_turns)
+            usage["prompt_tokens"] += call_usage["prompt_tokens"]
+            usage["completion_tokens"] += call_usage["completion_tokens"]
+        except Exception as e:
+            print(f"[WARN] 대화 요약 실패, 오래된 대화를 버립니다: {e}")
+        usage["calls"] += 1
+        usage["seconds"] += time.perf_counter() - start
+    return summary, turns, usage
+
+
+def stream_reply(client: "OpenAI", model_id: str, messages: list[dict], max_tokens: int = 300) -> dict:
+    """
+    답변을 토큰 단위로 받아 바로 출력
+
+    Returns:
+        {"reply", "latency_s", "first_token_s", "prompt_tokens", "completion_tokens"}
+    """
+    start = time.perf_counter()
+    first_token_s = None
+    parts = []
+    usage = None
+
+    stream = client.chat.completions.create(
+        model=model_id,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - start
+            parts.append(delta)
+            print(delta, end="", flush=True)
+    print()
+
+    reply = "".join(parts)
+    return {
+        "reply": reply,
+        "latency_s": time.perf_counter() - start,
+        "first_token_s": first_token_s or 0.0,
+        # usage 를 주지 않는 엔드포인트면 로컬 토크나이저로 추정
+        "prompt_tokens": usage.prompt_tokens if usage else count_message_tokens(messages),
+        "completion_tokens": usage.completion_tokens if usage else count_message_tokens(
+            [{"role": "assistant", "content": reply}]),
+    }
+
+
+def chat_with_kiwooming(client: "OpenAI", model_id: str, system_prompt: str,
+                        history_budget: int = DEFAULT_HISTORY_TOKENS):
     """
     키우밍과 대화하기
     
@@ -51,11 +198,11 @@ def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
         client: OpenAI 클라이언트
         model_id: 파인튜닝된 모델 ID
         system_prompt: 키우밍 페르소나 프롬프트
+        history_budget: 한 번에 보낼 대화 기록의 최대 토큰 수
     """
-    # 대화 히스토리 초기화
-    conversation_history = [
-        {"role": "system", "content": system_prompt}
-    ]
+    # 대화 히스토리 초기화 (시스템 프롬프트는 build_messages 에서 붙임)
+    summary = ""
+    turns: list[dict] = []
     
     print("\n" + "=" * 80)
     print("🌱 키우밍과 대화를 시작합니다!")
@@ -64,6 +211,7 @@ def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
     print("  • 궁금한 투자 질문을 자유롭게 해보세요")
     print("  • 'quit', 'exit', '종료'를 입력하면 대화가 종료됩니다")
     print("  • 'clear', '초기화'를 입력하면 대화 기록이 초기화됩니다")
+    print(f"  • 대화 기록은 약 {history_budget:,} 토큰까지 보내고, 넘치면 요약해서 이어갑니다")
     print("-" * 80)
     
     # 키우밍 인사말
@@ -72,6 +220,7 @@ def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
     
     # 대화 루프
     message_count = 0
+    total_tokens = 0
     
     while True:
         try:
@@ -81,14 +230,14 @@ def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
             # 종료 명령어 체크
             if user_input.lower() in ['quit', 'exit', '종료', 'q']:
                 print("\n🌱 키우밍: 오늘도 좋은 투자 되세요! 다음에 또 만나요 👋")
+                print(f"[INFO] {message_count}턴, 총 {total_tokens:,} 토큰 사용")
                 print("=" * 80)
                 break
             
             # 초기화 명령어 체크
             if user_input.lower() in ['clear', '초기화', 'reset']:
-                conversation_history = [
-                    {"role": "system", "content": system_prompt}
-                ]
+                summary = ""
+                turns = []
                 message_count = 0
                 print("\n[INFO] 대화 기록이 초기화되었습니다.\n")
                 continue
@@ -97,39 +246,37 @@ def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
             if not user_input:
                 continue
             
-            # 사용자 메시지 추가
-            conversation_history.append({
+            # 사용자 메시지 추가 후 토큰 예산에 맞게 정리
+            turns.append({
                 "role": "user",
                 "content": user_input
             })
+            summary, turns, summary_usage = fit_history(client, model_id, system_prompt, summary, turns,
+                                                        history_budget)
             
-            # API 호출
+            # API 호출 (스트리밍)
             print("\n🌱 키우밍: ", end="", flush=True)
-            
-            response = client.chat.completions.create(
-                model=model_id,
-                messages=conversation_history,
-                temperature=0.7,
-                max_tokens=300
-            )
-            
-            # 키우밍 답변 추출
-            assistant_reply = response.choices[0].message.content
-            
-            # 답변 출력
-            print(f"{assistant_reply}\n")
+            result = stream_reply(client, model_id, build_messages(system_prompt, summary, turns))
             
             # 대화 히스토리에 추가
-            conversation_history.append({
+            turns.append({
                 "role": "assistant",
-                "content": assistant_reply
+                "content": result["reply"]
             })
             
             message_count += 1
-            
-            # 대화가 너무 길어지면 경고
-            if message_count > 10:
-                print("[TIP] 대화가 길어지면 토큰 비용이 증가해요. 'clear'로 초기화할 수 있어요.\n")
+            # 이번 턴에 한 요약 호출까지 포함한 지연 / 토큰 사용량
+            latency_s = result["latency_s"] + summary_usage["seconds"]
+            prompt_tokens = result["prompt_tokens"] + summary_usage["prompt_tokens"]
+            completion_tokens = result["completion_tokens"] + summary_usage["completion_tokens"]
+            total_tokens += prompt_tokens + completion_tokens
+
+            summary_note = ""
+            if summary_usage["calls"]:
+                summary_note = f", 요약 {summary_usage['calls']}회 {summary_usage['seconds']:.2f}초 포함"
+            print(f"   ⏱️ {latency_s:.2f}초 (첫 토큰 {result['first_token_s']:.2f}초{summary_note}) | "
+                  f"입력 {prompt_tokens:,} / 출력 {completion_tokens:,} 토큰 | "
+                  f"기록 {len(turns)}개{' + 요약' if summary else ''}\n")
         
         except KeyboardInterrupt:
             print("\n\n🌱 키우밍: 대화를 종료할게요. 좋은 하루 보내세요! 👋")
@@ -137,6 +284,9 @@ def chat_with_kiwooming(client: OpenAI, model_id: str, system_prompt: str):
             break
         
         except Exception as e:
+            # 실패한 질문은 기록에서 빼서 다음 턴에 다시 보내지 않음
+            if turns and turns[-1]["role"] == "user":
+                turns.pop()
             print(f"\n[ERROR] 오류가 발생했습니다: {e}")
             print("다시 시도해보세요.\n")
 
@@ -146,7 +296,7 @@ def get_ai_response(user_input: str, context: str | None = None) -> str:
     """
     try:
         config = load_config()
-        client = OpenAI(api_key=config["openai_api_key"])
+        client = get_client(config["openai_api_key"])
         model_id = config.get("kiwume_model_id")
         system_prompt = config.get("kiwooming_system_prompt", "당신은 키움증권 투자 도우미 키우밍입니다.")
 
@@ -198,14 +348,14 @@ def main():
     
     # 2. OpenAI 클라이언트 초기화
     try:
-        client = OpenAI(api_key=api_key)
+        client = get_client(api_key)
         print("[OK] OpenAI 클라이언트 초기화 완료")
     except Exception as e:
         print(f"[ERROR] OpenAI 클라이언트 초기화 실패: {e}")
         return
     
     # 3. 대화 시작
-    chat_with_kiwooming(client, model_id, kiwooming_prompt)
+    chat_with_kiwooming(client, model_id, kiwooming_prompt, history_budget=config["history_tokens"])
 
 
 if __name__ == "__main__":
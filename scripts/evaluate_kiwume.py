@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+키우밍 파인튜닝 모델 오프라인 평가 스크립트
+held-out JSONL(kiwume_train.jsonl 형식)을 읽어 여러 모델에 동시에 질문하고,
+응답 지연 분포 / 토큰 사용량 / 정답 답변과의 겹침 점수를 비교합니다.
+
+    - 입력은 스트리밍으로 읽고, 동시에 처리 중인 요청 수를 제한 (답변 본문은 --results 파일로만 기록)
+    - 분당 요청 수(--rpm) 제한
+    - 응답은 (모델, 프롬프트 해시) 키로 디스크에 캐시 → 다시 돌리면 API 호출 없음
+    - 겹침 점수: 어절 F1, 글자 bigram F1 (한국어 기준)
+
+KIWUME: 모델 비교 평가 스크립트
+
+사용 예:
+    python scripts/evaluate_kiwume.py --models ft:gpt-4o-mini:...:kiwume-v1 ft:gpt-4o-mini:...:kiwume-v2
+    python scripts/evaluate_kiwume.py --stub   # 로컬 스텁 API로 CI 실행
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import orjson
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class RateLimiter:
+    """분당 요청 수 제한 (토큰 버킷, 스레드 안전)"""
+
+    def __init__(self, rpm: float):
+        self.rate = rpm / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """(모델, 프롬프트 해시) → 응답 JSON 파일"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(model: str, messages: list[dict], params: dict) -> str:
+        prompt = orjson.dumps({"messages": messages, "params": params}, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(model.encode("utf-8") + b"\x00" + prompt).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            return orjson.loads(path.read_bytes())
+        except orjson.JSONDecodeError:
+            return None
+
+    def put(self, key: str, value: dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(orjson.dumps(value))
+        os.replace(tmp, path)
+
+
+def iter_examples(eval_jsonl: str, limit: int | None = None):
+    """
+    평가 JSONL을 한 줄씩 읽기
+
+    Yields:
+        (예제 번호, 프롬프트 messages, 정답 답변)
+    """
+    with open(eval_jsonl, "rb") as f:
+        n = 0
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            messages = orjson.loads(line)["messages"]
+            if not messages or messages[-1]["role"] != "assistant":
+                continue
+            yield line_no, messages[:-1], messages[-1]["content"]
+            n += 1
+            if limit and n >= limit:
+                return
+
+
+def has_examples(eval_jsonl: Path) -> bool:
+    """평가할 예제가 하나 이상 있는지 (파일이 없거나 비어 있으면 False)"""
+    if not eval_jsonl.is_file():
+        return False
+    return next(iter_examples(str(eval_jsonl), limit=1), None) is not None
+
+
+def _f1(pred: Counter, ref: Counter) -> float:
+    overlap = sum((pred & ref).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(pred.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def overlap_scores(prediction: str, reference: str) -> dict:
+    """정답 답변과의 겹침 점수 (어절 F1, 글자 bigram F1)"""
+    pred_chars = "".join(prediction.split())
+    ref_chars = "".join(reference.split())
+    return {
+        "word_f1": _f1(Counter(prediction.split()), Counter(reference.split())),
+        "char_bigram_f1": _f1(
+            Counter(pred_chars[i:i + 2] for i in range(len(pred_chars) - 1)),
+            Counter(ref_chars[i:i + 2] for i in range(len(ref_chars) - 1)),
+        ),
+    }
+
+
+def call_model(client, cache: ResponseCache, limiter: RateLimiter, model: str,
+               messages: list[dict], params: dict) -> dict:
+    """캐시에 있으면 캐시 응답, 없으면 API 호출 후 캐시에 저장"""
+    key = ResponseCache.key(model, messages, params)
+    cached = cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    limiter.acquire()
+    start = time.perf_counter()
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    latency = time.perf_counter() - start
+
+    usage = response.usage
+    result = {
+        "reply": response.choices[0].message.content or "",
+        "latency_s": latency,
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "completion_tokens": usage.completion_tokens if usage else 0,
+    }
+    cache.put(key, result)
+    return {**result, "cached": False}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(rows: list[dict]) -> dict:
+    """모델 하나의 결과 요약"""
+    ok = [r for r in rows if "error" not in r]
+    latencies = sorted(r["latency_s"] for r in ok)
+    return {
+        "examples": len(rows),
+        "errors": len(rows) - len(ok),
+        "cached": sum(1 for r in ok if r["cached"]),
+        "latency_s": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.5), 3),
+            "p90": round(percentile(latencies, 0.9), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "tokens": {
+            "prompt": sum(r["prompt_tokens"] for r in ok),
+            "completion": sum(r["completion_tokens"] for r in ok),
+        },
+        "word_f1": round(statistics.fmean(r["word_f1"] for r in ok), 4) if ok else 0.0,
+        "char_bigram_f1": round(statistics.fmean(r["char_bigram_f1"] for r in ok), 4) if ok else 0.0,
+    }
+
+
+def evaluate(client, eval_jsonl: str, models: list[str], cache_dir: Path, concurrency: int = 8,
+             rpm: float = 500, limit: int | None = None, temperature: float = 0.0, max_tokens: int = 300,
+             results_path: Path | None = None) -> dict:
+    """
+    평가 실행
+
+    Args:
+        client: OpenAI 클라이언트
+        eval_jsonl: 평가 JSONL 경로
+        models: 비교할 모델 ID 목록
+        cache_dir: 응답 캐시 디렉토리
+        concurrency: 동시 요청 수
+        rpm: 분당 최대 API 요청 수 (0이면 제한 없음, 캐시 응답은 세지 않음)
+        limit: 평가할 최대 예제 수
+        temperature / max_tokens: 생성 파라미터 (캐시 키에 포함)
+        results_path: 예제별 결과 JSONL 경로 (선택)
+
+    Returns:
+        모델별 요약 dict
+    """
+    cache = ResponseCache(cache_dir)
+    limiter = RateLimiter(rpm)
+    params = {"temperature": temperature, "max_tokens": max_tokens}
+    per_model: dict[str, list[dict]] = {m: [] for m in models}
+    results_file = open(results_path, "wb") if results_path else None
+
+    def task(line_no: int, model: str, messages: list[dict], reference: str) -> dict:
+        try:
+            result = call_model(client, cache, limiter, model, messages, params)
+        except Exception as e:
+            return {"line": line_no, "model": model, "error": str(e)}
+        return {"line": line_no, "model": model, **result, **overlap_scores(result["reply"], reference)}
+
+    def collect(row: dict):
+        # 요약에 필요 없는 답변 본문은 파일로만 쓰고 메모리에는 남기지 않음
+        if results_file:
+            results_file.write(orjson.dumps(row) + b"\n")
+        row.pop("reply", None)
+        per_model[row["model"]].append(row)
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending = deque()
+            for line_no, messages, reference in iter_examples(eval_jsonl, limit):
+                for model in models:
+                    pending.append(pool.submit(task, line_no, model, messages, reference))
+                while len(pending) >= concurrency * 2:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    finally:
+        if results_file:
+            results_file.close()
+
+    elapsed = time.perf_counter() - start
+    report = {model: summarize(rows) for model, rows in per_model.items()}
+
+    print(f"\n[RESULT] 평가 완료 ({elapsed:.1f}초)")
+    print("-" * 80)
+    print(f"{'model':<40} {'n':>5} {'err':>4} {'cache':>5} {'p50(s)':>7} {'p90(s)':>7} "
+          f"{'tokens':>9} {'wordF1':>7} {'bigramF1':>8}")
+    for model, r in report.items():
+        tokens = r["tokens"]["prompt"] + r["tokens"]["completion"]
+        print(f"{model[-40:]:<40} {r['examples']:>5} {r['errors']:>4} {r['cached']:>5} "
+              f"{r['latency_s']['p50']:>7.2f} {r['latency_s']['p90']:>7.2f} {tokens:>9,} "
+              f"{r['word_f1']:>7.3f} {r['char_bigram_f1']:>8.3f}")
+    print("-" * 80)
+    return report
+
+
+def main():
+    """메인 실행 함수"""
+
+    # KIWUME: 프로젝트 루트 기준 경로 설정
+    project_root = Path(__file__).parent.parent
+
+    parser = argparse.ArgumentParser(description="키우밍 모델 오프라인 평가")
+    parser.add_argument("--eval-file", type=Path, default=None,
+                        help="평가 JSONL (기본값: kiwume_valid.jsonl, 비어 있으면 kiwume_train.jsonl)")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="비교할 모델 ID (기본값: KIWUME_MODEL_ID)")
+    parser.add_argument("--cache-dir", type=Path, default=project_root / "data" / "eval_cache")
+    parser.add_argument("--report", type=Path, default=project_root / "data" / "kiwume_eval_report.json")
+    parser.add_argument("--results", type=Path, default=None, help="예제별 결과 JSONL 경로")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=500, help="분당 최대 요청 수 (0이면 제한 없음)")
+    parser.add_argument("--limit", type=int, default=None, help="평가할 최대 예제 수")
+    parser.add_argument("--temperature", type=float, default=0.0)
+    parser.add_argument("--max-tokens", type=int, default=300)
+    parser.add_argument("--stub", action="store_true", help="로컬 스텁 API로 실행 (CI용)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("키우밍 모델 오프라인 평가")
+    print("=" * 80)
+
+    if args.eval_file is None:
+        # 데이터가 적으면 validation 분할이 비어 있을 수 있음 → train 파일로 대체 (학습 데이터라 점수는 참고용)
+        args.eval_file = project_root / "data" / "kiwume_valid.jsonl"
+        train_file = project_root / "data" / "kiwume_train.jsonl"
+        if not has_examples(args.eval_file) and has_examples(train_file):
+            print(f"[WARN] {args.eval_file.name} 에 예제가 없어 {train_file.name} 로 평가합니다 (학습 데이터라 점수는 참고용).")
+            args.eval_file = train_file
+
+    if not has_examples(args.eval_file):
+        print(f"[ERROR] 평가 파일이 없거나 예제가 없습니다: {args.eval_file}")
+        print("        python scripts/make_kiwume_jsonl.py 로 kiwume_valid.jsonl 을 먼저 만드세요.")
+        sys.exit(1)
+
+    from openai import OpenAI
+
+    server = None
+    if args.stub:
+        from stub_openai_server import serve_in_thread
+        server, _, base_url = serve_in_thread()
+        client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+        models = args.models or ["stub-base", "stub-tuned"]
+        print(f"[TEST] 스텁 API: {base_url}")
+    else:
+        from dotenv import load_dotenv
+        load_dotenv()  # .env 파일 읽기
+        api_key = os.getenv("OPENAI_API_KEY")
+        models = args.models or [m for m in [os.getenv("KIWUME_MODEL_ID")] if m]
+        if not api_key or not models:
+            print("[ERROR] OPENAI_API_KEY 와 --models (또는 KIWUME_MODEL_ID) 가 필요합니다.")
+            return
+        client = OpenAI(api_key=api_key)
+
+    print(f"[OK] 평가 파일: {args.eval_file}")
+    print(f"     모델: {', '.join(models)}")
+    print(f"     동시 요청: {args.concurrency}, 분당 제한: {args.rpm:g}")
+
+    try:
+        report = evaluate(
+            client, str(args.eval_file), models, args.cache_dir,
+            concurrency=args.concurrency, rpm=args.rpm, limit=args.limit,
+            temperature=args.temperature, max_tokens=args.max_tokens, results_path=args.results,
+        )
+    finally:
+        if server:
+            server.shutdown()
+
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[SAVED] 평가 리포트: {args.report}")
+
+    # 평가된 예제가 없는 모델이 있으면 CI 에서 통과로 보지 않음
+    if any(r["errors"] or not r["examples"] for r in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,30 @@
 키우ME 파인튜닝 실행 스크립트
 OpenAI API를 사용하여 gpt-4o-mini 모델을 파인튜닝합니다.
 
+데이터셋 내용 해시로 키를 잡은 로컬 manifest 에 업로드한 파일 ID와 작업 ID를 기록해,
+같은 파일이면 다시 업로드하지 않고 진행 중인 작업은 이어서 모니터링합니다.
+
 KIWUME: OpenAI 파인튜닝 자동화 스크립트
+
+사용 예:
+    python scripts/finetune_kiwume.py
+    python scripts/finetune_kiwume.py --training-file data/kiwume_train_dedup.jsonl
+    python scripts/finetune_kiwume.py --stub   # 로컬 스텁 API로 전체 흐름 테스트
 """
 
+import argparse
+import hashlib
 import os
 import sys
+import tempfile
 import time
 import json
 from pathlib import Path
-from openai import OpenAI
+from typing import TYPE_CHECKING
+
+# KIWUME: openai SDK는 실제로 API를 호출할 때 로드
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 # KIWUME: Windows 콘솔 한글 출력 설정
 if sys.platform == 'win32':
@@ -53,7 +68,7 @@ def load_config():
     }
 
 
-def upload_training_file(client: OpenAI, file_path: str):
+def upload_training_file(client: "OpenAI", file_path: str):
     """
     학습용 JSONL 파일을 OpenAI에 업로드
     
@@ -78,7 +93,74 @@ def upload_training_file(client: OpenAI, file_path: str):
     return file_id
 
 
-def create_finetune_job(client: OpenAI, file_id: str, model: str = "gpt-4o-mini-2024-07-18", suffix: str = "kiwume-v1"):
+def file_sha256(file_path: str) -> str:
+    """파일 내용 SHA-256 (스트리밍)"""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def has_rows(file_path: Path) -> bool:
+    """JSONL 파일이 있고 비어 있지 않은 행이 하나 이상인지 (빈 파일은 업로드해도 API 가 거부)"""
+    if not file_path.is_file() or file_path.stat().st_size == 0:
+        return False
+    with open(file_path, "rb") as f:
+        return any(line.strip() for line in f)
+
+
+def load_manifest(manifest_path: Path) -> dict:
+    """업로드 / 작업 manifest 로드 (없으면 빈 manifest)"""
+    if manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    else:
+        manifest = {}
+    manifest.setdefault("files", {})
+    manifest.setdefault("jobs", {})
+    return manifest
+
+
+def save_manifest(manifest_path: Path, manifest: dict):
+    """manifest 저장 (임시 파일에 쓰고 교체 → 중간에 끊겨도 깨지지 않음)"""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=manifest_path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def get_or_upload_file(client: "OpenAI", file_path: str, manifest: dict, manifest_path: Path) -> tuple[str, str]:
+    """
+    같은 내용의 파일을 이미 올렸으면 그 파일 ID를 재사용, 아니면 업로드
+
+    Returns:
+        (파일 ID, 내용 해시)
+    """
+    digest = file_sha256(file_path)
+    entry = manifest["files"].get(digest)
+    if entry:
+        try:
+            client.files.retrieve(entry["file_id"])
+            print(f"[REUSE] 동일한 파일이 이미 업로드되어 있습니다: {entry['file_id']} ({Path(file_path).name})")
+            return entry["file_id"], digest
+        except Exception as e:
+            print(f"[INFO] 기존 파일을 찾을 수 없어 다시 업로드합니다: {e}")
+
+    file_id = upload_training_file(client, file_path)
+    manifest["files"][digest] = {
+        "file_id": file_id,
+        "filename": Path(file_path).name,
+        "bytes": os.path.getsize(file_path),
+        "uploaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    save_manifest(manifest_path, manifest)
+    return file_id, digest
+
+
+def create_finetune_job(client: "OpenAI", file_id: str, model: str = "gpt-4o-mini-2024-07-18", suffix: str = "kiwume-v1",
+                        validation_file_id: str | None = None):
     """
     파인튜닝 작업 생성
     
@@ -94,12 +176,16 @@ def create_finetune_job(client: OpenAI, file_id: str, model: str = "gpt-4o-mini-
     print(f"[CREATE] 파인튜닝 작업 생성 중...")
     print(f"   베이스 모델: {model}")
     print(f"   학습 파일 ID: {file_id}")
+    if validation_file_id:
+        print(f"   검증 파일 ID: {validation_file_id}")
     print(f"   모델 Suffix: {suffix}")
     
+    kwargs = {"validation_file": validation_file_id} if validation_file_id else {}
     response = client.fine_tuning.jobs.create(
         training_file=file_id,
         model=model,
-        suffix=suffix  # KIWUME: 모델 이름에 suffix 추가
+        suffix=suffix,  # KIWUME: 모델 이름에 suffix 추가
+        **kwargs
     )
     
     job_id = response.id
@@ -108,30 +194,88 @@ def create_finetune_job(client: OpenAI, file_id: str, model: str = "gpt-4o-mini-
     return job_id
 
 
-def monitor_finetune_job(client: OpenAI, job_id: str):
+def fetch_new_events(client: "OpenAI", job_id: str, last_event_id: str | None, page_limit: int = 50) -> list:
     """
-    파인튜닝 작업 상태를 모니터링
+    last_event_id 이후의 새 이벤트만 가져오기 (API는 최신순 → 시간순으로 뒤집어 반환)
+    """
+    collected = []
+    after = None
+    while True:
+        kwargs = {"limit": page_limit}
+        if after:
+            kwargs["after"] = after
+        page = client.fine_tuning.jobs.list_events(job_id, **kwargs)
+        for event in page.data:
+            if event.id == last_event_id:
+                return list(reversed(collected))
+            collected.append(event)
+        if not page.has_more or not page.data:
+            break
+        after = page.data[-1].id
+    return list(reversed(collected))
+
+
+def monitor_finetune_job(client: "OpenAI", job_id: str, checkpoint: dict | None = None, on_checkpoint=None,
+                         min_interval: float = 2.0, max_interval: float = 60.0):
+    """
+    파인튜닝 작업 이벤트를 이어서 출력하며 모니터링
+    새 이벤트가 없으면 확인 간격을 늘리고(최대 max_interval), 있으면 다시 줄인다.
+    진행 상황은 checkpoint 에 기록되어 Ctrl+C 후 다시 실행하면 이어서 본다.
     
     Args:
         client: OpenAI 클라이언트
         job_id: 파인튜닝 작업 ID
+        checkpoint: 상태를 기록할 dict (last_event_id, status, fine_tuned_model)
+        on_checkpoint: checkpoint 가 바뀔 때 호출 (manifest 저장)
+        min_interval: 최소 확인 간격 (초)
+        max_interval: 최대 확인 간격 (초)
         
     Returns:
         완료된 파인튜닝 모델 ID
     """
+    checkpoint = checkpoint if checkpoint is not None else {}
+    last_event_id = checkpoint.get("last_event_id")
+    interval = min_interval
+
+    def save(status: str, model_id: str | None = None):
+        checkpoint.update({
+            "status": status,
+            "last_event_id": last_event_id,
+            "fine_tuned_model": model_id,
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        if on_checkpoint:
+            on_checkpoint()
+
     print(f"\n[MONITOR] 파인튜닝 진행 상황 모니터링 중...")
+    if last_event_id:
+        print(f"   (이전 체크포인트에서 이어서: {last_event_id})")
     print("   (Ctrl+C로 중단 가능, 작업은 계속 진행됩니다)")
     print("-" * 80)
     
     try:
         while True:
-            # 작업 상태 확인
-            job = client.fine_tuning.jobs.retrieve(job_id)
+            try:
+                events = fetch_new_events(client, job_id, last_event_id)
+                job = client.fine_tuning.jobs.retrieve(job_id)
+            except Exception as e:
+                interval = min(interval * 2, max_interval)
+                print(f"[WARN] 상태 조회 실패, {interval:.0f}초 후 재시도: {e}")
+                time.sleep(interval)
+                continue
+
+            for event in events:
+                timestamp = time.strftime("%H:%M:%S", time.localtime(event.created_at))
+                print(f"[{timestamp}] {event.message}")
+
+            if events:
+                last_event_id = events[-1].id
+                interval = min_interval
+            else:
+                interval = min(interval * 2, max_interval)
+
             status = job.status
-            
-            # 상태 출력
-            timestamp = time.strftime("%H:%M:%S")
-            print(f"[{timestamp}] 상태: {status}")
+            save(status, job.fine_tuned_model)
             
             # 완료 상태 확인
             if status == "succeeded":
@@ -152,25 +296,28 @@ def monitor_finetune_job(client: OpenAI, job_id: str):
                 print(f"[CANCELLED] 파인튜닝 작업이 취소되었습니다.")
                 return None
             
-            # 10초마다 체크
-            time.sleep(10)
+            time.sleep(interval)
             
     except KeyboardInterrupt:
+        save(checkpoint.get("status") or "running", checkpoint.get("fine_tuned_model"))
         print("\n[INFO] 모니터링 중단됨. 작업은 백그라운드에서 계속 진행됩니다.")
+        print("   같은 명령을 다시 실행하면 마지막 이벤트부터 이어서 모니터링합니다.")
         print(f"   작업 확인: https://platform.openai.com/finetune/{job_id}")
         return None
 
 
-def save_model_info(model_id: str, job_id: str):
+def save_model_info(model_id: str, job_id: str, output_file: Path | None = None):
     """
     완료된 모델 정보를 파일로 저장
     
     Args:
         model_id: 파인튜닝된 모델 ID
         job_id: 파인튜닝 작업 ID
+        output_file: 저장 경로 (기본값: data/kiwume_model_info.json)
     """
-    project_root = Path(__file__).parent.parent
-    output_file = project_root / "data" / "kiwume_model_info.json"
+    if output_file is None:
+        project_root = Path(__file__).parent.parent
+        output_file = project_root / "data" / "kiwume_model_info.json"
     
     model_info = {
         "model_id": model_id,
@@ -186,16 +333,133 @@ def save_model_info(model_id: str, job_id: str):
     print(f"\n[SAVED] 모델 정보 저장됨: {output_file}")
 
 
+def run_finetune(client: "OpenAI", training_file: Path, validation_file: Path | None, base_model: str,
+                 model_suffix: str, manifest_path: Path, min_interval: float = 2.0, max_interval: float = 60.0):
+    """
+    업로드 → 작업 생성 → 모니터링 (manifest 로 재사용 / 이어하기)
+
+    Returns:
+        (파인튜닝 모델 ID 또는 None, 작업 ID 또는 None)
+    """
+    manifest = load_manifest(manifest_path)
+
+    # 1. 파일 업로드 (내용이 같으면 재사용)
+    try:
+        file_id, train_hash = get_or_upload_file(client, str(training_file), manifest, manifest_path)
+        valid_id, valid_hash = None, None
+        if validation_file:
+            valid_id, valid_hash = get_or_upload_file(client, str(validation_file), manifest, manifest_path)
+    except Exception as e:
+        print(f"[ERROR] 파일 업로드 실패: {e}")
+        return None, None
+
+    # 2. 파인튜닝 작업 생성 (같은 데이터·모델·suffix 작업이 있으면 재사용)
+    job_key = f"{train_hash}:{valid_hash or '-'}:{base_model}:{model_suffix}"
+    entry = manifest["jobs"].get(job_key)
+    if entry and entry.get("status") not in ("failed", "cancelled"):
+        job_id = entry["job_id"]
+        print(f"[REUSE] 기존 파인튜닝 작업을 이어서 사용합니다: {job_id} (상태: {entry.get('status')})")
+        if entry.get("status") == "succeeded" and entry.get("fine_tuned_model"):
+            return entry["fine_tuned_model"], job_id
+    else:
+        try:
+            job_id = create_finetune_job(client, file_id, base_model, model_suffix, valid_id)
+        except Exception as e:
+            print(f"[ERROR] 파인튜닝 작업 생성 실패: {e}")
+            return None, None
+        entry = {
+            "job_id": job_id,
+            "training_file": file_id,
+            "validation_file": valid_id,
+            "base_model": base_model,
+            "suffix": model_suffix,
+            "status": "created",
+            "last_event_id": None,
+        }
+        manifest["jobs"][job_key] = entry
+        save_manifest(manifest_path, manifest)
+
+    # 3. 작업 모니터링 (체크포인트를 manifest 에 기록)
+    model_id = monitor_finetune_job(
+        client, job_id, checkpoint=entry,
+        on_checkpoint=lambda: save_manifest(manifest_path, manifest),
+        min_interval=min_interval, max_interval=max_interval,
+    )
+    return model_id, job_id
+
+
+def run_stub_test(training_file: Path, validation_file: Path | None) -> bool:
+    """
+    로컬 스텁 API로 전체 흐름을 두 번 실행해 검증
+    두 번째 실행은 업로드와 작업 생성 없이 manifest 만으로 끝나야 한다.
+    """
+    from openai import OpenAI
+    from stub_openai_server import serve_in_thread
+
+    server, state, base_url = serve_in_thread(job_seconds=2.0, steps=4)
+    client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+    print(f"[TEST] 스텁 API: {base_url}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = Path(tmp) / "manifest.json"
+        try:
+            first, _ = run_finetune(client, training_file, validation_file, "gpt-4o-mini-2024-07-18",
+                                    "kiwume-test", manifest_path, min_interval=0.2, max_interval=1.0)
+            uploads_after_first = dict(state.stats)
+            second, _ = run_finetune(client, training_file, validation_file, "gpt-4o-mini-2024-07-18",
+                                     "kiwume-test", manifest_path, min_interval=0.2, max_interval=1.0)
+        finally:
+            server.shutdown()
+
+    n_files = 2 if validation_file else 1
+    checks = {
+        "첫 실행에서 모델 생성": bool(first),
+        "두 번째 실행 결과 동일": first == second,
+        f"파일 업로드 {n_files}회": state.stats.get("files.create", 0) == n_files,
+        "작업 생성 1회": state.stats.get("jobs.create", 0) == 1,
+        "두 번째 실행에서 추가 업로드 없음": uploads_after_first.get("files.create") == state.stats.get("files.create"),
+    }
+    print("\n" + "=" * 80)
+    for name, ok in checks.items():
+        print(f"[TEST] {'OK  ' if ok else 'FAIL'} {name}")
+    print(f"[TEST] API 호출: {state.stats}")
+    print("=" * 80)
+    return all(checks.values())
+
+
 def main():
     """메인 실행 함수"""
     
+    # KIWUME: 프로젝트 경로 설정
+    project_root = Path(__file__).parent.parent
+
+    parser = argparse.ArgumentParser(description="키우ME 파인튜닝 스크립트")
+    parser.add_argument("--training-file", type=Path, default=project_root / "data" / "kiwume_train.jsonl")
+    parser.add_argument("--validation-file", type=Path, default=project_root / "data" / "kiwume_valid.jsonl",
+                        help="없으면 검증 파일 없이 진행")
+    parser.add_argument("--manifest", type=Path, default=project_root / "data" / "kiwume_finetune_manifest.json")
+    parser.add_argument("--stub", action="store_true", help="로컬 스텁 API로 전체 흐름 테스트")
+    args = parser.parse_args()
+
+    training_file = args.training_file
+    validation_file = args.validation_file if has_rows(args.validation_file) else None
+    
     print("=" * 80)
     print("키우ME 파인튜닝 스크립트")
     print("=" * 80)
     
-    # KIWUME: 프로젝트 경로 설정
-    project_root = Path(__file__).parent.parent
-    training_file = project_root / "data" / "kiwume_train.jsonl"
+    # 학습 파일 존재 확인
+    if not training_file.exists():
+        print(f"[ERROR] 학습 파일을 찾을 수 없습니다: {training_file}")
+        return
+    if not has_rows(training_file):
+        print(f"[ERROR] 학습 파일이 비어 있습니다: {training_file}")
+        return
+    if validation_file is None and args.validation_file.exists():
+        print(f"[INFO] 검증 파일이 비어 있어 검증 파일 없이 진행합니다: {args.validation_file}")
+
+    if args.stub:
+        sys.exit(0 if run_stub_test(training_file, validation_file) else 1)
     
     # 1. 설정 로드
     try:
@@ -211,32 +475,14 @@ def main():
         return
     
     # 2. OpenAI 클라이언트 초기화
+    from openai import OpenAI
     client = OpenAI(api_key=api_key)
     print("[OK] OpenAI 클라이언트 초기화 완료")
     
-    # 3. 학습 파일 존재 확인
-    if not training_file.exists():
-        print(f"[ERROR] 학습 파일을 찾을 수 없습니다: {training_file}")
-        return
-    
-    # 4. 파일 업로드
-    try:
-        file_id = upload_training_file(client, str(training_file))
-    except Exception as e:
-        print(f"[ERROR] 파일 업로드 실패: {e}")
-        return
-    
-    # 5. 파인튜닝 작업 생성
-    try:
-        job_id = create_finetune_job(client, file_id, base_model, model_suffix)
-    except Exception as e:
-        print(f"[ERROR] 파인튜닝 작업 생성 실패: {e}")
-        return
+    # 3. 업로드 → 작업 생성 → 모니터링
+    model_id, job_id = run_finetune(client, training_file, validation_file, base_model, model_suffix, args.manifest)
     
-    # 6. 작업 모니터링
-    model_id = monitor_finetune_job(client, job_id)
-    
-    # 7. 완료 시 모델 정보 저장
+    # 4. 완료 시 모델 정보 저장
     if model_id:
         save_model_info(model_id, job_id)
         print("\n" + "=" * 80)
@@ -248,4 +494,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
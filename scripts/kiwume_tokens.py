@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 토큰 수 계산
+tiktoken 이 설치되어 있으면 실제 토크나이저를, 없으면 글자 수 기반 근사치를 사용합니다.
+
+KIWUME: 데이터셋 분석 / CLI 대화 토큰 예산용
+"""
+
+from functools import lru_cache
+
+# chat 형식 오버헤드 (OpenAI 가이드 기준: 메시지당 3토큰, 답변 시작 3토큰)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+
+@lru_cache(maxsize=8)
+def get_encoder(model: str = "gpt-4o-mini"):
+    """
+    모델에 맞는 tiktoken 인코더 (tiktoken 이 없으면 None)
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def is_exact(model: str = "gpt-4o-mini") -> bool:
+    """실제 토크나이저를 쓰는지 여부"""
+    return get_encoder(model) is not None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """텍스트 토큰 수"""
+    if not text:
+        return 0
+    enc = get_encoder(model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+
+    # 근사치: 영문/숫자는 4글자당 1토큰, 한글 등 비ASCII는 글자당 약 1토큰
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return max(1, round(ascii_chars / 4 + (len(text) - ascii_chars)))
+
+
+def count_message_tokens(messages: list[dict], model: str = "gpt-4o-mini") -> int:
+    """chat messages 전체 토큰 수 (형식 오버헤드 포함)"""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE + count_tokens(message.get("content") or "", model)
+    return total
@@ -4,15 +4,32 @@
 키우ME 파인튜닝 데이터셋 생성 스크립트
 CSV 파일을 OpenAI 파인튜닝용 JSONL 형식으로 변환합니다.
 
+수백만 행 규모의 상담 로그도 메모리 사용량이 일정하도록 스트리밍으로 처리합니다.
+    - CSV를 제너레이터로 한 행씩 읽고, 청크 단위로 여러 프로세스에서 검증 + orjson 직렬화
+    - 빈 필드 / 길이 제한 검증 (걸러낸 행은 사유별로 집계)
+    - 행 내용 해시 기반의 결정적(deterministic) train / validation 분할
+    - --shard-size 지정 시 N행 단위 샤드 파일로 출력
+
 KIWUME: CSV → JSONL 변환 스크립트
+
+사용 예:
+    python scripts/make_kiwume_jsonl.py
+    python scripts/make_kiwume_jsonl.py --input logs.csv --workers 8 --shard-size 500000
 """
 
+import argparse
 import csv
+import hashlib
 import json
+import multiprocessing as mp
 import os
 import sys
+import time
+from collections import deque
 from pathlib import Path
 
+import orjson
+
 # KIWUME: Windows 콘솔 한글 출력 설정
 if sys.platform == 'win32':
     import codecs
@@ -20,92 +37,314 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
-def csv_to_jsonl(input_csv: str, output_jsonl: str):
+# KIWUME: 시스템 프롬프트 정의 (금융 지식 중심), KIWUME_SYSTEM_PROMPT 또는 --system-prompt 로 변경 가능
+DEFAULT_SYSTEM_PROMPT = (
+    "너는 키움증권 사용자에게 투자 관련 금융 지식과 실용적인 조언을 제공하는 전문 강아지이다. "
+    "사용자의 질문이나 상황을 분석하여, 구체적인 투자 전략, 리스크 관리 방법, "
+    "키움증권 시스템 사용법 등을 명확하고 이해하기 쉽게 설명한다."
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_MAX_CHARS = 4000
+
+
+def iter_csv_rows(input_csv: str):
+    """
+    CSV를 한 행씩 읽는 제너레이터
+
+    Yields:
+        (user, reply) — 컬럼이 없으면 None
+    """
+    # csv 모듈 기본 필드 크기 제한(128KB)보다 긴 상담 로그도 읽을 수 있게 (길이 검증은 별도)
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(input_csv, 'r', encoding='utf-8', newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            yield row.get('user'), row.get('reply')
+
+
+def iter_chunks(rows, chunk_size: int):
+    """제너레이터를 chunk_size 단위 리스트로 묶기"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_row(user: str | None, reply: str | None, max_chars: int) -> str | None:
+    """
+    행 검증
+
+    Returns:
+        거절 사유 (통과하면 None)
+    """
+    if user is None or reply is None:
+        return "missing_column"
+    if not user.strip():
+        return "empty_user"
+    if not reply.strip():
+        return "empty_reply"
+    if len(user) > max_chars:
+        return "user_too_long"
+    if len(reply) > max_chars:
+        return "reply_too_long"
+    return None
+
+
+def is_validation_row(user: str, reply: str, val_ratio: float, seed: str) -> bool:
+    """행 내용 해시로 validation 여부 결정 (입력 순서·워커 수와 무관하게 항상 같은 결과)"""
+    if val_ratio <= 0:
+        return False
+    digest = hashlib.blake2b(f"{seed}\x00{user}\x00{reply}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 < val_ratio
+
+
+def process_chunk(args) -> tuple[bytes, bytes, int, int, dict]:
+    """
+    청크 하나를 검증 + 직렬화 (워커 프로세스에서 실행)
+
+    Returns:
+        (train JSONL bytes, validation JSONL bytes, train 행 수, validation 행 수, 거절 사유별 개수)
+    """
+    rows, system_prompt, max_chars, val_ratio, seed = args
+    train_lines = []
+    valid_lines = []
+    rejected: dict[str, int] = {}
+
+    for user_message, reply_text in rows:
+        reason = validate_row(user_message, reply_text, max_chars)
+        if reason:
+            rejected[reason] = rejected.get(reason, 0) + 1
+            continue
+
+        user_message = user_message.strip()
+        reply_text = reply_text.strip()
+
+        # KIWUME: OpenAI messages 형식으로 변환
+        # assistant의 content는 답변 텍스트만 포함 (emotion 제거)
+        message_obj = {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": reply_text},
+            ]
+        }
+        # orjson은 한글을 그대로 UTF-8로 출력
+        line = orjson.dumps(message_obj)
+
+        if is_validation_row(user_message, reply_text, val_ratio, seed):
+            valid_lines.append(line)
+        else:
+            train_lines.append(line)
+
+    train_bytes = b'\n'.join(train_lines) + b'\n' if train_lines else b''
+    valid_bytes = b'\n'.join(valid_lines) + b'\n' if valid_lines else b''
+    return train_bytes, valid_bytes, len(train_lines), len(valid_lines), rejected
+
+
+class ShardWriter:
+    """
+    shard_size 행마다 새 파일로 넘어가는 JSONL 작성기 (0이면 단일 파일)
+    keep_empty=False 면 한 행도 쓰지 않았을 때 파일을 만들지 않고, 이전 실행에서 남은 파일도 지움
+    """
+
+    def __init__(self, path: Path, shard_size: int = 0, keep_empty: bool = True):
+        self.path = path
+        self.shard_size = shard_size
+        self.keep_empty = keep_empty
+        self.paths: list[Path] = []
+        self._file = None
+        self._rows_in_shard = 0
+
+    def _open_next(self):
+        if self._file:
+            self._file.close()
+        if self.shard_size:
+            shard_path = self.path.with_name(f"{self.path.stem}-{len(self.paths):05d}{self.path.suffix}")
+        else:
+            shard_path = self.path
+        self._file = open(shard_path, 'wb')
+        self.paths.append(shard_path)
+        self._rows_in_shard = 0
+
+    def write(self, data: bytes, n_rows: int):
+        if not n_rows:
+            return
+        if self._file is None:
+            self._open_next()
+        if not self.shard_size:
+            self._file.write(data)
+            return
+
+        # 청크가 샤드 경계를 넘으면 줄 단위로 나눠 씀
+        lines = data.splitlines(keepends=True)
+        while lines:
+            if self._rows_in_shard >= self.shard_size:
+                self._open_next()
+            take = self.shard_size - self._rows_in_shard
+            self._file.write(b''.join(lines[:take]))
+            self._rows_in_shard += len(lines[:take])
+            lines = lines[take:]
+
+    def close(self):
+        if self._file is None:
+            if not self.keep_empty:
+                self.path.unlink(missing_ok=True)
+                return
+            self._open_next()
+        self._file.close()
+
+
+def csv_to_jsonl(
+    input_csv: str,
+    output_jsonl: str,
+    valid_jsonl: str | None = None,
+    system_prompt: str | None = None,
+    val_ratio: float = 0.0,
+    seed: str = "kiwume",
+    max_chars: int = DEFAULT_MAX_CHARS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+    shard_size: int = 0,
+) -> dict:
     """
     CSV 파일을 OpenAI 파인튜닝용 JSONL 형식으로 변환
-    
+
     Args:
         input_csv: 입력 CSV 파일 경로 (user, reply 컬럼 포함)
-        output_jsonl: 출력 JSONL 파일 경로
+        output_jsonl: 출력 JSONL 파일 경로 (train)
+        valid_jsonl: validation JSONL 파일 경로 (val_ratio > 0 일 때)
+        system_prompt: 시스템 프롬프트 (None이면 KIWUME_SYSTEM_PROMPT 또는 기본값)
+        val_ratio: validation 비율 (0이면 분할하지 않음)
+        seed: 분할 해시 seed
+        max_chars: user / reply 최대 글자 수
+        chunk_size: 워커에 넘기는 행 묶음 크기
+        workers: 직렬화 프로세스 수 (1이면 현재 프로세스에서 처리)
+        shard_size: 샤드당 최대 행 수 (0이면 단일 파일)
+
+    Returns:
+        변환 통계 dict
     """
-    
-    # KIWUME: 시스템 프롬프트 정의 (금융 지식 중심)
-    system_prompt = (
-        "너는 키움증권 사용자에게 투자 관련 금융 지식과 실용적인 조언을 제공하는 전문 강아지이다. "
-        "사용자의 질문이나 상황을 분석하여, 구체적인 투자 전략, 리스크 관리 방법, "
-        "키움증권 시스템 사용법 등을 명확하고 이해하기 쉽게 설명한다."
-    )
-    
-    # 변환된 데이터를 저장할 리스트
-    jsonl_data = []
-    
-    # CSV 파일 읽기 (UTF-8 인코딩)
-    with open(input_csv, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        for row in reader:
-            user_message = row['user']
-            reply_text = row['reply']
-            
-            # KIWUME: OpenAI messages 형식으로 변환
-            # assistant의 content는 답변 텍스트만 포함 (emotion 제거)
-            message_obj = {
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": user_message
-                    },
-                    {
-                        "role": "assistant",
-                        "content": reply_text
-                    }
-                ]
-            }
-            
-            jsonl_data.append(message_obj)
-    
-    # JSONL 파일로 저장 (한 줄에 하나의 JSON 객체)
-    with open(output_jsonl, 'w', encoding='utf-8') as jsonlfile:
-        for item in jsonl_data:
-            # ensure_ascii=False로 한글 유지
-            json_line = json.dumps(item, ensure_ascii=False)
-            jsonlfile.write(json_line + '\n')
-    
+    if system_prompt is None:
+        system_prompt = os.getenv("KIWUME_SYSTEM_PROMPT", DEFAULT_SYSTEM_PROMPT)
+    if val_ratio > 0 and not valid_jsonl:
+        raise ValueError("val_ratio > 0 이면 valid_jsonl 경로가 필요합니다.")
+
+    train_writer = ShardWriter(Path(output_jsonl), shard_size)
+    # validation 행이 하나도 없으면 빈 파일을 남기지 않음 (빈 validation_file 은 파인튜닝 API 가 거부)
+    valid_writer = ShardWriter(Path(valid_jsonl), shard_size, keep_empty=False) if val_ratio > 0 else None
+
+    stats = {"read": 0, "train": 0, "validation": 0, "rejected": {}}
+
+    def consume(result):
+        train_bytes, valid_bytes, n_train, n_valid, rejected = result
+        train_writer.write(train_bytes, n_train)
+        if valid_writer:
+            valid_writer.write(valid_bytes, n_valid)
+        stats["train"] += n_train
+        stats["validation"] += n_valid
+        for reason, count in rejected.items():
+            stats["rejected"][reason] = stats["rejected"].get(reason, 0) + count
+
+    def tasks():
+        for chunk in iter_chunks(iter_csv_rows(input_csv), chunk_size):
+            stats["read"] += len(chunk)
+            yield (chunk, system_prompt, max_chars, val_ratio, seed)
+
+    start = time.perf_counter()
+    try:
+        if workers <= 1:
+            for task in tasks():
+                consume(process_chunk(task))
+        else:
+            # 진행 중인 청크 수를 제한해 입력 크기와 무관하게 메모리 일정 유지 (Pool.imap은 입력을 미리 다 읽음)
+            with mp.Pool(workers) as pool:
+                pending = deque()
+                for task in tasks():
+                    pending.append(pool.apply_async(process_chunk, (task,)))
+                    if len(pending) >= workers * 2:
+                        consume(pending.popleft().get())
+                while pending:
+                    consume(pending.popleft().get())
+    finally:
+        train_writer.close()
+        if valid_writer:
+            valid_writer.close()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["rows_per_sec"] = stats["read"] / elapsed if elapsed > 0 else 0.0
+    stats["train_files"] = [str(p) for p in train_writer.paths]
+    stats["validation_files"] = [str(p) for p in valid_writer.paths] if valid_writer else []
+
     print(f"[OK] 변환 완료!")
     print(f"   입력: {input_csv}")
-    print(f"   출력: {output_jsonl}")
-    print(f"   총 {len(jsonl_data)}개의 샘플이 변환되었습니다.")
+    print(f"   출력: {', '.join(stats['train_files'])}")
+    if valid_writer:
+        print(f"   검증: {', '.join(stats['validation_files']) or '(validation 행 없음 — 파일 생성 안 함)'}")
+    print(f"   총 {stats['read']}행 중 train {stats['train']}개, validation {stats['validation']}개가 변환되었습니다.")
+    if stats["rejected"]:
+        reasons = ", ".join(f"{k}={v}" for k, v in sorted(stats["rejected"].items()))
+        print(f"   제외: {sum(stats['rejected'].values())}개 ({reasons})")
+    print(f"   처리 속도: {stats['rows_per_sec']:,.0f} rows/s ({elapsed:.2f}초)")
+
+    return stats
 
 
 def main():
     """메인 실행 함수"""
-    
+
     # KIWUME: 프로젝트 루트 기준 경로 설정
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
-    
-    input_csv = project_root / "data" / "kiwume_raw.csv"
-    output_jsonl = project_root / "data" / "kiwume_train.jsonl"
-    
+
+    parser = argparse.ArgumentParser(description="키우ME CSV → JSONL 변환")
+    parser.add_argument("--input", type=Path, default=project_root / "data" / "kiwume_raw.csv")
+    parser.add_argument("--output", type=Path, default=project_root / "data" / "kiwume_train.jsonl")
+    parser.add_argument("--valid-output", type=Path, default=project_root / "data" / "kiwume_valid.jsonl")
+    parser.add_argument("--val-ratio", type=float, default=0.1, help="validation 비율 (0이면 분할 안 함)")
+    parser.add_argument("--seed", default="kiwume", help="train/validation 분할 seed")
+    parser.add_argument("--system-prompt", default=None)
+    parser.add_argument("--max-chars", type=int, default=DEFAULT_MAX_CHARS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--shard-size", type=int, default=0, help="샤드당 최대 행 수 (0이면 단일 파일)")
+    args = parser.parse_args()
+
+    input_csv = args.input
+    output_jsonl = args.output
+
     # 입력 파일 존재 확인
     if not input_csv.exists():
         print(f"[ERROR] 입력 파일을 찾을 수 없습니다 - {input_csv}")
         return
-    
+
     # 출력 디렉토리 생성 (없으면)
     output_jsonl.parent.mkdir(parents=True, exist_ok=True)
-    
+    args.valid_output.parent.mkdir(parents=True, exist_ok=True)
+
     # 변환 실행
-    csv_to_jsonl(str(input_csv), str(output_jsonl))
-    
+    stats = csv_to_jsonl(
+        str(input_csv),
+        str(output_jsonl),
+        valid_jsonl=str(args.valid_output),
+        system_prompt=args.system_prompt,
+        val_ratio=args.val_ratio,
+        seed=args.seed,
+        max_chars=args.max_chars,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        shard_size=args.shard_size,
+    )
+
     # KIWUME: 변환 결과 샘플 출력
     print("\n[SAMPLE] 생성된 JSONL 샘플 (처음 2줄):")
     print("-" * 80)
-    with open(output_jsonl, 'r', encoding='utf-8') as f:
+    with open(stats["train_files"][0], 'r', encoding='utf-8') as f:
         for i, line in enumerate(f):
             if i < 2:  # 처음 2줄만 출력
                 print(json.dumps(json.loads(line), ensure_ascii=False, indent=2))
@@ -116,4 +355,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+뉴스 기사 요약 캐시 도우미
+newsdetail 화면에서 기사 내용을 묻는 질문을 알아보고, 기사 내용 해시 기준으로 요약을 한 번만 만듭니다.
+
+KIWUME: /chat 규칙 7 (기사 요약) 사전 계산용
+"""
+
+import re
+
+import orjson
+
+from scripts.ui_compare import content_hash
+
+NEWS_SCREENS = ("newsdetail",)
+
+# 규칙 7 예시 질문에서 뽑은 표현 (공백/문장부호 제거 후 비교)
+# 용어·종목 질문("PER이 뭔데?", "공매도 설명해줘")과 구분하려고, 기사를 가리키는 말로 시작하는 질문만 본다
+SUMMARY_PHRASES = ("뭐", "뭔", "무슨", "요약", "설명", "핵심", "정리", "쉽게", "뜻", "얘기")
+# "이게 …", "이 기사 …", "뉴스 …" 처럼 지금 보고 있는 기사를 가리키는 시작
+_DEICTIC = re.compile(r"^(이게|이건|이거|이것|이글|(이|위|지금|이번|해당)?(기사|뉴스|내용))")
+# 주어 없이 기사 전체를 묻는 질문 ("무슨 말이야?", "뭔 소리야")
+_ARTICLE_OPENERS = ("무슨말", "무슨내용", "무슨소리", "뭔소리", "뭔말", "뭔내용")
+# 대상 없이 요약만 요청 ("요약해줘", "세 줄 요약 부탁해")
+_BARE_REQUEST = re.compile(r"^((한|세)줄|간단히|짧게)?(요약|정리)(좀)?(해줘|해줄래|해주세요|해봐|부탁해|해)?$")
+# 화면 기능을 묻는 질문은 요약 대상이 아님
+UI_WORDS = ("버튼", "메뉴", "스크롤", "어디", "눌러", "클릭", "탭", "화면")
+
+_STRIP = re.compile(r"[\s?!.,~…ㅋㅎ]+")
+
+SUMMARY_PROMPT = """
+[시스템 규칙]
+너는 '키우밍'이라는 챗봇이야. 사용자가 뉴스 화면(newsdetail)에서 지금 보고 있는 기사를 요약해 달라고 했어.
+아래 backend_json / parser_json 에 담긴 기사 내용만 사용해서 요약하라.
+
+요약 형식은 아래를 반드시 따른다:
+
+배경(선택)
+- 필요한 경우에만 한 줄로 배경 또는 맥락을 제공하라.
+의미·영향
+- 기사에서 직접 언급된 영향·의미·시사점을 1~2문장으로 요약하라.
+- 추측해서 확장하지 말고 기사 안에서 확인되는 내용만 기재하라.
+현재 상황
+- 기사에서 언급된 현재 단계(승인, 심사, 발표 등)를 간단히 정리하라.
+
+다음과 같은 규칙을 따라라.
+기사에서 확인되지 않은 내용은 절대 생성하지 않는다.
+수치는 그대로 보존(금액·비율·날짜·기관명 등)하라.
+5줄 이내로 간결하게, 대신 핵심은 절대 빠뜨리지 않는다.
+“투자/경제/정책 기사”는 사실 중심, “사회/사건 기사”는 사건 구조 중심으로 요약하라.
+귀엽고 친근한 존댓말로, 가끔 🐾 이모지를 섞어라.
+
+[backend_json]
+{backend}
+
+[parser_json]
+{parser}
+"""
+
+
+def is_summary_question(text: str) -> bool:
+    """지금 보고 있는 기사 내용(요약)을 묻는 질문인지 여부"""
+    normalized = _STRIP.sub("", text or "")
+    if not normalized or any(w in normalized for w in UI_WORDS):
+        return False
+    if _BARE_REQUEST.match(normalized) or normalized.startswith(_ARTICLE_OPENERS):
+        return True
+    return bool(_DEICTIC.match(normalized)) and any(p in normalized for p in SUMMARY_PHRASES)
+
+
+def article_hash(backend_json: dict, parser_json: dict) -> str:
+    """화면에 표시된 기사 내용 해시 (같은 기사면 누가 물어도 같은 키)"""
+    return content_hash({"backend": backend_json, "parser": parser_json})
+
+
+def build_summary_prompt(backend_json: dict, parser_json: dict) -> str:
+    return SUMMARY_PROMPT.format(
+        backend=orjson.dumps(backend_json).decode(),
+        parser=orjson.dumps(parser_json).decode(),
+    )
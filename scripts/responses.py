@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+응답 인코딩 / 압축
+orjson 으로 직렬화하는 응답 클래스, NDJSON 스트리밍, gzip/brotli 압축 미들웨어 설정을 모아 둡니다.
+
+KIWUME: /compare, /chat 응답 크기·직렬화 시간 절감용
+"""
+
+import orjson
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ORJSONResponse(JSONResponse):
+    """orjson 직렬화 응답 (엔드포인트가 직접 반환하면 jsonable_encoder 단계도 건너뜀)"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+NDJSON_CHUNK_BYTES = 16 * 1024
+
+
+def iter_ndjson(items, chunk_bytes: int = NDJSON_CHUNK_BYTES):
+    """
+    dict 를 한 줄씩 직렬화해 chunk_bytes 단위로 묶어 내보냄
+    (줄마다 보내면 압축 미들웨어가 줄마다 flush 해서 압축률과 속도가 크게 떨어짐)
+
+    응답 헤더가 이미 나간 뒤라 상태 코드로 알릴 수 없으므로, items 에서 난 오류는
+    마지막 줄 {"error": ...} 로 내보낸다 (그 전까지 만든 줄도 버리지 않음).
+    """
+    buf = bytearray()
+    try:
+        for item in items:
+            buf += orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
+            if len(buf) >= chunk_bytes:
+                yield bytes(buf)
+                buf.clear()
+    except Exception as e:
+        buf += orjson.dumps({"error": str(e)}, option=orjson.OPT_APPEND_NEWLINE)
+    if buf:
+        yield bytes(buf)
+
+
+def ndjson_response(items) -> StreamingResponse:
+    """dict 를 만들어지는 대로 내보내는 NDJSON 스트리밍 응답"""
+    return StreamingResponse(iter_ndjson(items), media_type=NDJSON_MEDIA_TYPE)
+
+
+def add_compression(app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> str:
+    """
+    Accept-Encoding 에 맞춰 minimum_size 이상 응답을 압축
+    brotli-asgi 가 설치되어 있으면 br 우선 (gzip 만 받는 클라이언트는 gzip), 없으면 gzip 만 사용
+
+    Returns:
+        사용 중인 압축 방식 ("br+gzip" / "gzip")
+    """
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=minimum_size, compresslevel=gzip_level)
+        return "gzip"
+
+    app.add_middleware(BrotliMiddleware, quality=brotli_quality, minimum_size=minimum_size, gzip_fallback=True)
+    return "br+gzip"
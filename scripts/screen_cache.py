@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+화면 데이터 캐시
+backend_cache / parser_cache / compare_cache 의 항목별 크기·나이·히트 수를 기록합니다.
+
+SCREEN_CACHE_DB 가 설정되면 같은 호스트의 uvicorn 워커들이 sqlite(WAL) 파일 하나를
+공유하므로, 화면 문서와 compare 결과를 워커마다 따로 들고 있거나 따로 받아오지 않습니다.
+
+KIWUME: /cache/stats, /cache/invalidate, 멀티 워커 공유 캐시용
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import orjson
+
+FILL_WAIT_SECONDS = 15.0
+# 공유 모드 히트/미스 카운터는 프로세스에 모았다가 한 번에 기록 (읽기마다 쓰기 락을 잡지 않도록)
+COUNTER_FLUSH_EVERY = 200
+COUNTER_FLUSH_SECONDS = 10.0
+
+
+class SharedStore:
+    """
+    여러 프로세스가 공유하는 sqlite(WAL) 저장소
+
+    - entries: (cache, key) → 직렬화된 값 + 메타데이터, UPSERT 한 번으로 원자적으로 교체
+    - leases: 이름 → (owner, 만료 시각), 워커 간 워머 선출과 채우기 중복 방지에 사용
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    cache TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    stored_at REAL NOT NULL,
+                    validated_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (cache, key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    cache TEXT PRIMARY KEY,
+                    misses INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """쓰기 트랜잭션 (중첩 시 가장 바깥 트랜잭션에 합쳐짐)"""
+        conn = self._conn()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+
+    def query(self, sql: str, params: tuple = ()) -> list:
+        return self._conn().execute(sql, params).fetchall()
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """만료됐거나 비어 있는 lease를 획득 (이미 내 것이면 연장)"""
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                (name, owner, now + ttl),
+            )
+        return True
+
+    def release(self, name: str, owner: str):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+
+class ScreenCache:
+    """
+    dict 처럼 쓰는 화면별 캐시
+
+    `get()` 은 히트/미스를 세고, `in` / `[]` 는 세지 않는다 (내부 갱신용).
+    값을 제자리에서 수정했다면 다시 대입해 저장한다 (히트 수는 유지).
+    store 가 주어지면 값은 프로세스 메모리가 아니라 공유 저장소에 직렬화되어 저장된다.
+    """
+
+    def __init__(self, name: str, store: SharedStore | None = None, owner: str = ""):
+        self.name = name
+        self.store = store
+        self.owner = owner
+        self._data: dict[str, dict] = {}
+        self._meta: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._fill_locks: dict[str, threading.Lock] = {}
+        self.misses = 0
+        # 공유 모드에서 아직 기록하지 않은 카운터
+        self._pending_hits: dict[str, int] = {}
+        self._pending_misses = 0
+        self._flushed_at = time.time()
+
+    def __contains__(self, key: str) -> bool:
+        if self.store:
+            return bool(self.store.query(
+                "SELECT 1 FROM entries WHERE cache = ? AND key = ?", (self.name, key)))
+        return key in self._data
+
+    def __getitem__(self, key: str) -> dict:
+        if self.store:
+            rows = self.store.query(
+                "SELECT value FROM entries WHERE cache = ? AND key = ?", (self.name, key))
+            if not rows:
+                raise KeyError(key)
+            return orjson.loads(rows[0][0])
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: dict):
+        now = time.time()
+        if self.store:
+            with self.store.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO entries (cache, key, value, stored_at, validated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(cache, key) DO UPDATE SET value = excluded.value, "
+                    "stored_at = excluded.stored_at, validated_at = excluded.validated_at",
+                    (self.name, key, orjson.dumps(value), now, now),
+                )
+            return
+
+        with self._lock:
+            prev = self._meta.get(key, {})
+            self._data[key] = value
+            self._meta[key] = {
+                "stored_at": now,
+                "validated_at": now,
+                "size_bytes": len(orjson.dumps(value)),
+                "hits": prev.get("hits", 0),
+            }
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def _count(self, key: str, hit: bool):
+        with self._lock:
+            if hit:
+                self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+            else:
+                self._pending_misses += 1
+            pending = sum(self._pending_hits.values()) + self._pending_misses
+            due = pending >= COUNTER_FLUSH_EVERY or time.time() - self._flushed_at >= COUNTER_FLUSH_SECONDS
+        if due:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """모아 둔 히트/미스 수를 공유 저장소에 기록"""
+        with self._lock:
+            hits, self._pending_hits = self._pending_hits, {}
+            misses, self._pending_misses = self._pending_misses, 0
+            self._flushed_at = time.time()
+        if not self.store or not (hits or misses):
+            return
+        with self.store.transaction() as conn:
+            conn.executemany(
+                "UPDATE entries SET hits = hits + ? WHERE cache = ? AND key = ?",
+                [(n, self.name, key) for key, n in hits.items()],
+            )
+            if misses:
+                conn.execute(
+                    "INSERT INTO counters (cache, misses) VALUES (?, ?) "
+                    "ON CONFLICT(cache) DO UPDATE SET misses = misses + excluded.misses", (self.name, misses))
+
+    def get(self, key: str, default=None):
+        if self.store:
+            rows = self.store.query(
+                "SELECT value FROM entries WHERE cache = ? AND key = ?", (self.name, key))
+            self._count(key, hit=bool(rows))
+            return orjson.loads(rows[0][0]) if rows else default
+
+        with self._lock:
+            if key in self._data:
+                self._meta[key]["hits"] += 1
+                return self._data[key]
+            self.misses += 1
+        return default
+
+    def get_or_fill(self, key: str, fill):
+        """
+        캐시 미스 시 fill() 결과를 저장해 반환
+        동시에 같은 키를 채우려는 스레드/워커는 한 곳만 fill() 하고 나머지는 결과를 기다린다.
+        (프로세스 안에서는 키별 락, 워커 사이에서는 lease — lease 소유자는 워커 단위라 락이 먼저 필요)
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            lock = self._fill_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key in self:
+                return self[key]
+
+            if not self.store:
+                value = fill()
+                self[key] = value
+                return value
+
+            lease = f"fill:{self.name}:{key}"
+            deadline = time.time() + FILL_WAIT_SECONDS
+            while not self.store.try_acquire(lease, self.owner, FILL_WAIT_SECONDS):
+                if time.time() > deadline:
+                    break
+                time.sleep(0.05)
+                if key in self:
+                    return self[key]
+            try:
+                if key in self:
+                    return self[key]
+                value = fill()
+                self[key] = value
+                return value
+            finally:
+                self.store.release(lease, self.owner)
+
+    def pop(self, key: str, default=None):
+        if self.store:
+            with self.store.transaction() as conn:
+                row = conn.execute(
+                    "SELECT value FROM entries WHERE cache = ? AND key = ?", (self.name, key)).fetchone()
+                conn.execute("DELETE FROM entries WHERE cache = ? AND key = ?", (self.name, key))
+            return orjson.loads(row[0]) if row else default
+
+        with self._lock:
+            self._meta.pop(key, None)
+            return self._data.pop(key, default)
+
+    def keys(self) -> list[str]:
+        if self.store:
+            return [r[0] for r in self.store.query("SELECT key FROM entries WHERE cache = ?", (self.name,))]
+        return list(self._data)
+
+    def touch(self, key: str):
+        """재검증(304) 후 검증 시각만 갱신"""
+        now = time.time()
+        if self.store:
+            with self.store.transaction() as conn:
+                conn.execute(
+                    "UPDATE entries SET validated_at = ? WHERE cache = ? AND key = ?", (now, self.name, key))
+            return
+
+        with self._lock:
+            meta = self._meta.get(key)
+            if meta is not None:
+                meta["validated_at"] = now
+
+    def stats(self) -> dict:
+        now = time.time()
+        if self.store:
+            self.flush_counters()
+            rows = self.store.query(
+                "SELECT key, length(value), stored_at, validated_at, hits FROM entries WHERE cache = ?",
+                (self.name,))
+            metas = {
+                key: {"size_bytes": size, "stored_at": stored, "validated_at": validated, "hits": hits}
+                for key, size, stored, validated, hits in rows
+            }
+            miss_rows = self.store.query("SELECT misses FROM counters WHERE cache = ?", (self.name,))
+            misses = miss_rows[0][0] if miss_rows else 0
+        else:
+            with self._lock:
+                metas = {key: dict(meta) for key, meta in self._meta.items()}
+            misses = self.misses
+
+        entries = {
+            key: {
+                "size_bytes": meta["size_bytes"],
+                "age_s": round(now - meta["stored_at"], 1),
+                "validated_age_s": round(now - meta["validated_at"], 1),
+                "hits": meta["hits"],
+            }
+            for key, meta in metas.items()
+        }
+        return {
+            "entries": len(entries),
+            "size_bytes": sum(e["size_bytes"] for e in entries.values()),
+            "hits": sum(e["hits"] for e in entries.values()),
+            "misses": misses,
+            "screens": entries,
+        }
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 서버 기동 시간 프로파일 + 콜드 스타트 예산 검사
+`import main` 의 import-time 리포트와 uvicorn 기동 후 첫 응답(TTFB)까지의 시간을 측정합니다.
+
+KIWUME: 콜드 스타트 예산 (초과 시 종료 코드 1 → CI 회귀 검사용)
+    - import main          : 1500ms 이하  (STARTUP_IMPORT_BUDGET_MS)
+    - uvicorn 기동 → 첫 응답 : 3000ms 이하  (STARTUP_TTFB_BUDGET_MS)
+    - import main 직후 openai / numpy / pandas 가 로드되어 있으면 안 됨 (처음 쓸 때 로드)
+
+사용 예:
+    python scripts/startup_profile.py --runs 5
+    python scripts/startup_profile.py --top 15 --skip-ttfb
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).parent.parent
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+TTFB_BUDGET_MS = float(os.getenv("STARTUP_TTFB_BUDGET_MS", "3000"))
+LAZY_MODULES = ("openai", "numpy", "pandas")
+
+
+def import_time_report() -> tuple[float, list[tuple[str, int]]]:
+    """
+    python -X importtime 으로 import main 을 실행
+
+    Returns:
+        (main 누적 import 시간 ms, [(main 이 직접 import 한 모듈, 누적 us), ...])
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, encoding="utf-8",
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    top_level = []
+    main_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line.split("|")
+            cumulative_us = int(cumulative)
+        except ValueError:
+            continue  # 헤더
+        # 들여쓰기 2칸 = 한 단계 (main 이 직접 import 한 모듈은 1단계)
+        stripped = name.rstrip()
+        depth = (len(stripped) - len(stripped.lstrip()) - 1) // 2
+        if stripped.strip() == "main" and depth == 0:
+            main_us = cumulative_us
+        elif depth == 1:
+            top_level.append((stripped.strip(), cumulative_us))
+
+    return main_us / 1000, sorted(top_level, key=lambda x: -x[1])
+
+
+def loaded_heavy_modules() -> list[str]:
+    """import main 직후 이미 로드된 무거운 모듈 목록"""
+    code = (
+        "import sys, main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True, encoding="utf-8")
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_ttfb(timeout: float = 30.0) -> float:
+    """uvicorn 프로세스 시작부터 GET / 첫 200 응답까지 (ms)"""
+    port = free_port()
+    env = dict(os.environ, PRELOAD_BLOCKING="0")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as res:
+                    if res.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("uvicorn이 제한 시간 안에 응답하지 않았습니다.")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="AI 서버 기동 시간 프로파일")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="리포트에 표시할 import 수")
+    parser.add_argument("--skip-ttfb", action="store_true", help="uvicorn TTFB 측정 생략")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("AI 서버 기동 시간 프로파일")
+    print("=" * 80)
+
+    failures = []
+
+    import_ms = []
+    report = []
+    for _ in range(args.runs):
+        ms, report = import_time_report()
+        import_ms.append(ms)
+    import_median = statistics.median(import_ms)
+
+    print(f"\n[IMPORT] import main: {import_median:.0f}ms (median of {args.runs}, 예산 {IMPORT_BUDGET_MS:.0f}ms)")
+    print("-" * 80)
+    for name, us in report[:args.top]:
+        print(f"   {us / 1000:>8.1f}ms  {name}")
+    if import_median > IMPORT_BUDGET_MS:
+        failures.append(f"import main {import_median:.0f}ms > {IMPORT_BUDGET_MS:.0f}ms")
+
+    heavy = loaded_heavy_modules()
+    print(f"\n[LAZY] import 직후 로드된 무거운 모듈: {', '.join(heavy) or '없음'}")
+    if heavy:
+        failures.append(f"지연 로드 대상이 import 시점에 로드됨: {heavy}")
+
+    if not args.skip_ttfb:
+        ttfb = statistics.median(measure_ttfb() for _ in range(args.runs))
+        print(f"\n[TTFB] uvicorn 기동 → 첫 응답: {ttfb:.0f}ms (예산 {TTFB_BUDGET_MS:.0f}ms)")
+        if ttfb > TTFB_BUDGET_MS:
+            failures.append(f"TTFB {ttfb:.0f}ms > {TTFB_BUDGET_MS:.0f}ms")
+
+    print("=" * 80)
+    if failures:
+        for f in failures:
+            print(f"[FAIL] {f}")
+        sys.exit(1)
+    print("[OK] 콜드 스타트 예산 통과")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 OpenAI API 스텁 서버
+파일 업로드, 파인튜닝 작업, chat completions API를 흉내냅니다. 실제 API 키나 비용 없이
+finetune_kiwume.py / evaluate_kiwume.py 의 흐름을 검증할 때 사용합니다.
+
+    POST /v1/files                              학습 파일 업로드 (multipart)
+    GET  /v1/files/{id}                         파일 조회
+    POST /v1/fine_tuning/jobs                   파인튜닝 작업 생성
+    GET  /v1/fine_tuning/jobs/{id}              작업 조회
+    GET  /v1/fine_tuning/jobs/{id}/events       작업 이벤트 (최신순, limit / after 지원)
+    POST /v1/chat/completions                   마지막 user 메시지를 바탕으로 한 고정 답변 (stream 지원)
+    GET  /__stats                               엔드포인트별 호출 수
+
+작업은 생성 후 job_seconds 동안 validating_files → running → succeeded 로 진행됩니다.
+
+KIWUME: OpenAI 스텁 서버
+
+사용 예:
+    python scripts/stub_openai_server.py --port 8090
+    OpenAI(api_key="stub", base_url="http://127.0.0.1:8090/v1")
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+
+class StubState:
+    """업로드된 파일, 파인튜닝 작업, 호출 통계"""
+
+    def __init__(self, job_seconds: float = 3.0, steps: int = 5, chat_latency: float = 0.05):
+        self.lock = threading.Lock()
+        self.job_seconds = job_seconds
+        self.steps = steps
+        self.chat_latency = chat_latency
+        self.files: dict[str, dict] = {}
+        self.jobs: dict[str, dict] = {}
+        self.stats: dict[str, int] = {}
+
+    def count(self, name: str):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def add_file(self, filename: str, data: bytes, purpose: str) -> dict:
+        obj = {
+            "id": _new_id("file"),
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self.lock:
+            self.files[obj["id"]] = obj
+        return obj
+
+    def add_job(self, body: dict) -> dict:
+        now = time.time()
+        job_id = _new_id("ftjob")
+        job = {
+            "id": job_id,
+            "object": "fine_tuning.job",
+            "created_at": int(now),
+            "error": None,
+            "fine_tuned_model": None,
+            "finished_at": None,
+            "hyperparameters": {"n_epochs": 3},
+            "model": body.get("model"),
+            "organization_id": "org-stub",
+            "result_files": [],
+            "seed": 0,
+            "status": "validating_files",
+            "trained_tokens": None,
+            "training_file": body.get("training_file"),
+            "validation_file": body.get("validation_file"),
+            "suffix": body.get("suffix"),
+            "_started": now,
+            "_events": [],
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+        self._advance(job)
+        return job
+
+    def _event(self, job: dict, message: str, created_at: float):
+        job["_events"].append({
+            "id": _new_id("ftevent"),
+            "object": "fine_tuning.job.event",
+            "created_at": int(created_at),
+            "level": "info",
+            "message": message,
+            "type": "message",
+        })
+
+    def _advance(self, job: dict):
+        """경과 시간에 맞춰 작업 상태와 이벤트를 진행"""
+        with self.lock:
+            elapsed = time.time() - job["_started"]
+            progress = min(1.0, elapsed / self.job_seconds) if self.job_seconds else 1.0
+            step_due = int(progress * self.steps)
+            n_steps_logged = sum(1 for e in job["_events"] if e["message"].startswith("Step "))
+
+            if not job["_events"]:
+                self._event(job, "Validating training file", job["_started"])
+            if progress > 0 and job["status"] == "validating_files":
+                job["status"] = "running"
+                self._event(job, "Fine-tuning job started", time.time())
+            for step in range(n_steps_logged + 1, step_due + 1):
+                self._event(job, f"Step {step}/{self.steps}: training loss={1.0 / step:.4f}", time.time())
+            if progress >= 1.0 and job["status"] == "running":
+                job["status"] = "succeeded"
+                job["finished_at"] = int(time.time())
+                job["trained_tokens"] = 1000 * self.steps
+                job["fine_tuned_model"] = f"ft:{job['model']}:kiwume:{job['suffix']}:{job['id'][-8:]}"
+                self._event(job, "The job has successfully completed", time.time())
+
+    def public_job(self, job: dict) -> dict:
+        self._advance(job)
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def list_events(self, job: dict, limit: int, after: str | None) -> dict:
+        self._advance(job)
+        events = list(reversed(job["_events"]))  # 최신순
+        if after:
+            ids = [e["id"] for e in events]
+            events = events[ids.index(after) + 1:] if after in ids else []
+        return {"object": "list", "data": events[:limit], "has_more": len(events) > limit}
+
+    def chat_completion(self, body: dict) -> dict:
+        """마지막 user 메시지를 되짚는 결정적 답변 (모델 이름마다 말투만 다름)"""
+        time.sleep(self.chat_latency)
+        messages = body.get("messages", [])
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        model = body.get("model") or "stub"
+        reply = f"{user} 이 부분이 궁금하시군요 🐾" if len(model) % 2 else f"{user}에 대해 차근차근 알려드릴게요."
+        finish_reason = "stop"
+        if body.get("max_tokens") and len(reply) // 2 + 1 > body["max_tokens"]:
+            reply = reply[:body["max_tokens"] * 2]
+            finish_reason = "length"
+        # 토큰 수는 글자 수 기반 근사치
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 2 + 3 * len(messages)
+        completion_tokens = len(reply) // 2 + 1
+        return {
+            "id": _new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": finish_reason,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def chat_completion_chunks(self, body: dict):
+        """stream=True 응답: 답변을 몇 글자씩 나눈 chunk, 마지막에 usage chunk (include_usage 일 때)"""
+        completion = self.chat_completion(body)
+        reply = completion["choices"][0]["message"]["content"]
+        base = {"id": completion["id"], "object": "chat.completion.chunk",
+                "created": completion["created"], "model": completion["model"]}
+
+        yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}
+        for i in range(0, len(reply), 4):
+            yield {**base, "choices": [{"index": 0, "delta": {"content": reply[i:i + 4]}, "finish_reason": None}]}
+        finish_reason = completion["choices"][0]["finish_reason"]
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": completion["usage"]}
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, code: int, obj: dict):
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_sse(self, chunks):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(b"data: " + json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n\n")
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+        def _not_found(self, what: str):
+            self._send_json(404, {"error": {"message": f"No such {what}", "type": "invalid_request_error"}})
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            query = parse_qs(url.query)
+
+            if parts == ["__stats"]:
+                with state.lock:
+                    self._send_json(200, dict(state.stats))
+                return
+
+            if parts[:2] == ["v1", "files"] and len(parts) == 3:
+                state.count("files.retrieve")
+                obj = state.files.get(parts[2])
+                self._send_json(200, obj) if obj else self._not_found("file")
+                return
+
+            if parts[:3] == ["v1", "fine_tuning", "jobs"] and len(parts) >= 4:
+                job = state.jobs.get(parts[3])
+                if job is None:
+                    self._not_found("job")
+                    return
+                if len(parts) == 5 and parts[4] == "events":
+                    state.count("jobs.list_events")
+                    limit = int(query.get("limit", ["20"])[0])
+                    after = query.get("after", [None])[0]
+                    self._send_json(200, state.list_events(job, limit, after))
+                else:
+                    state.count("jobs.retrieve")
+                    self._send_json(200, state.public_job(job))
+                return
+
+            self._not_found("route")
+
+        def do_POST(self):
+            parts = [p for p in urlparse(self.path).path.split("/") if p]
+            body = self._read_body()
+
+            if parts == ["v1", "files"]:
+                state.count("files.create")
+                ctype = self.headers.get("Content-Type", "")
+                msg = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                    b"Content-Type: " + ctype.encode("latin-1") + b"\r\n\r\n" + body)
+                filename, data, purpose = "upload.jsonl", b"", "fine-tune"
+                for part in msg.iter_parts():
+                    name = part.get_param("name", header="content-disposition")
+                    if name == "file":
+                        filename = part.get_filename() or filename
+                        data = part.get_payload(decode=True) or b""
+                    elif name == "purpose":
+                        purpose = (part.get_payload(decode=True) or b"").decode("utf-8")
+                # 실제 API 처럼 내용이 없는 파일은 거부
+                if not data.strip():
+                    self._send_json(400, {"error": {"message": "File is empty.", "type": "invalid_request_error"}})
+                    return
+                self._send_json(200, state.add_file(filename, data, purpose))
+                return
+
+            if parts == ["v1", "chat", "completions"]:
+                state.count("chat.completions")
+                payload = json.loads(body or b"{}")
+                if payload.get("stream"):
+                    self._send_sse(state.chat_completion_chunks(payload))
+                else:
+                    self._send_json(200, state.chat_completion(payload))
+                return
+
+            if parts == ["v1", "fine_tuning", "jobs"]:
+                state.count("jobs.create")
+                payload = json.loads(body or b"{}")
+                if payload.get("training_file") not in state.files:
+                    self._not_found("training file")
+                    return
+                if payload.get("validation_file") and payload["validation_file"] not in state.files:
+                    self._not_found("validation file")
+                    return
+                self._send_json(200, state.public_job(state.add_job(payload)))
+                return
+
+            self._not_found("route")
+
+    return Handler
+
+
+def serve_in_thread(host: str = "127.0.0.1", port: int = 0, **state_kwargs):
+    """
+    백그라운드 스레드에서 스텁 서버 실행
+
+    Returns:
+        (server, state, base_url) — 종료는 server.shutdown()
+    """
+    state = StubState(**state_kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="로컬 OpenAI API 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--job-seconds", type=float, default=10.0, help="파인튜닝 작업 완료까지 걸리는 시간")
+    parser.add_argument("--chat-latency", type=float, default=0.05, help="chat completions 응답 지연 (초)")
+    args = parser.parse_args()
+
+    state = StubState(job_seconds=args.job_seconds, chat_latency=args.chat_latency)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"[OK] OpenAI 스텁 서버 실행: http://{args.host}:{args.port}/v1")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] 스텁 서버 종료")
+
+
+if __name__ == "__main__":
+    main()
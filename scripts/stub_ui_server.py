@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 backend / parser 스텁 서버
+/ui/{screen}, /parse/{screen}, /chart/{code} 를 흉내내고 ETag / Last-Modified 조건부 요청을 지원합니다.
+
+KIWUME: 캐시 refresh 사이클의 대역폭·CPU 절감량 측정용
+
+사용 예:
+    python scripts/stub_ui_server.py --port 8001
+    BACKEND_URL=http://localhost:8001 PARSER_URL=http://localhost:8001 uvicorn main:app
+
+관리용 경로:
+    GET  /__stats           요청 수, 304 수, 전송 바이트
+    POST /__stats/reset     카운터 초기화
+    POST /__touch/{screen}  해당 화면 문서의 description 하나를 변경 (UI 배포 흉내)
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# KIWUME: Windows 콘솔 한글 출력 설정
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+DEFAULT_SCREENS = ["home", "stockhome", "newsdetail", "order", "quote", "chart"]
+
+
+def make_backend_doc(screen: str, n_components: int = 8, n_elements: int = 12) -> dict:
+    """합성 backend UI 문서 생성"""
+    regions = ["top", "middle", "bottom"]
+    components = []
+    for c in range(n_components):
+        components.append({
+            "component": f"{screen}_section_{c}",
+            "region": regions[c % 3],
+            "elements": [
+                {
+                    "element_label": f"{screen}_btn_{c}_{e}",
+                    "description": f"{screen} 화면 {c}번 영역의 {e}번 기능입니다.",
+                }
+                for e in range(n_elements)
+            ],
+        })
+    return {"screen": screen, "components": components}
+
+
+def make_parser_doc(screen: str, n_components: int = 8, n_elements: int = 12) -> dict:
+    """합성 parser 문서 생성 (backend label을 포함하는 tag)"""
+    elements = []
+    for c in range(n_components):
+        for e in range(n_elements):
+            elements.append({
+                "tag": f"<Button id='{screen}_btn_{c}_{e}'>",
+                "attrs": {"id": f"{screen}_btn_{c}_{e}", "text": f"기능 {c}-{e}"},
+            })
+    return {"screen": screen, "elements": elements}
+
+
+def make_chart_doc(code: str, n: int = 150) -> dict:
+    """합성 일봉 차트 문서 생성"""
+    candles = []
+    price = 50000
+    for i in range(n):
+        price += (i * 37) % 900 - 430
+        candles.append({
+            "cur_prc": str(price),
+            "high_pric": str(price + 300),
+            "low_pric": str(price - 300),
+            "trde_qty": str(100000 + (i * 7919) % 50000),
+        })
+    # 최신 봉이 마지막에 오도록 정렬
+    return {"stk_cd": code, "stk_dt_pole_chart_qry": candles}
+
+
+class StubStore:
+    """문서 저장소 + 전송 통계"""
+
+    def __init__(self, data_dir: Path | None = None, validators: bool = True):
+        self.lock = threading.Lock()
+        self.docs: dict[str, dict] = {}
+        self.validators = validators
+        self.stats = {"requests": 0, "not_modified": 0, "bytes_sent": 0}
+
+        for sc in DEFAULT_SCREENS:
+            self.put(f"/ui/{sc}", make_backend_doc(sc))
+            self.put(f"/parse/{sc}", make_parser_doc(sc))
+
+        # data_dir/ui/<screen>.json, data_dir/parse/<screen>.json 이 있으면 덮어씀
+        if data_dir:
+            for kind in ("ui", "parse"):
+                for f in sorted((data_dir / kind).glob("*.json")):
+                    with open(f, "r", encoding="utf-8") as fp:
+                        self.put(f"/{kind}/{f.stem.lower()}", json.load(fp))
+
+    def put(self, path: str, doc: dict):
+        body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        with self.lock:
+            self.docs[path] = {
+                "doc": doc,
+                "body": body,
+                "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+                "mtime": time.time(),
+            }
+
+    def get(self, path: str):
+        with self.lock:
+            return self.docs.get(path)
+
+    def touch(self, screen: str) -> bool:
+        """첫 backend 요소의 description을 바꿔 배포를 흉내낸다"""
+        entry = self.get(f"/ui/{screen}")
+        if not entry:
+            return False
+        doc = json.loads(entry["body"])
+        comps = doc.get("components", [])
+        if comps and comps[0].get("elements"):
+            el = comps[0]["elements"][0]
+            el["description"] = f"{el['description'].split(' @')[0]} @{time.time():.3f}"
+        self.put(f"/ui/{screen}", doc)
+        return True
+
+
+def make_handler(store: StubStore):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, code: int, obj: dict):
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/").lower()
+
+            if path == "/__stats":
+                with store.lock:
+                    self._send_json(200, dict(store.stats))
+                return
+
+            if path.startswith("/chart/"):
+                entry = {"body": json.dumps(make_chart_doc(path.split("/")[-1])).encode("utf-8"),
+                         "etag": None, "mtime": time.time()}
+            else:
+                entry = store.get(path)
+                if entry is None:
+                    self._send_json(404, {"detail": f"unknown path: {path}"})
+                    return
+
+            with store.lock:
+                store.stats["requests"] += 1
+
+            if store.validators and entry["etag"]:
+                inm = self.headers.get("If-None-Match")
+                ims = self.headers.get("If-Modified-Since")
+                not_modified = False
+                if inm is not None:
+                    not_modified = inm == entry["etag"]
+                elif ims is not None:
+                    try:
+                        not_modified = int(entry["mtime"]) <= parsedate_to_datetime(ims).timestamp()
+                    except (TypeError, ValueError):
+                        not_modified = False
+
+                if not_modified:
+                    with store.lock:
+                        store.stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", entry["etag"])
+                    self.end_headers()
+                    return
+
+            body = entry["body"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if store.validators and entry["etag"]:
+                self.send_header("ETag", entry["etag"])
+                self.send_header("Last-Modified", formatdate(entry["mtime"], usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+            with store.lock:
+                store.stats["bytes_sent"] += len(body)
+
+        def do_POST(self):
+            path = self.path.split("?", 1)[0].rstrip("/").lower()
+
+            if path == "/__stats/reset":
+                with store.lock:
+                    for k in store.stats:
+                        store.stats[k] = 0
+                self._send_json(200, {"ok": True})
+                return
+
+            if path.startswith("/__touch/"):
+                screen = path.split("/")[-1]
+                self._send_json(200 if store.touch(screen) else 404, {"screen": screen})
+                return
+
+            self._send_json(404, {"detail": f"unknown path: {path}"})
+
+    return Handler
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="키우밍 backend/parser 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="ui/<screen>.json, parse/<screen>.json 이 들어있는 디렉토리")
+    parser.add_argument("--no-validators", action="store_true",
+                        help="ETag / Last-Modified 를 보내지 않음 (기존 서버 흉내)")
+    args = parser.parse_args()
+
+    store = StubStore(args.data_dir, validators=not args.no_validators)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store))
+    print(f"[OK] 스텁 서버 실행: http://{args.host}:{args.port} (validators={store.validators})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] 스텁 서버 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+parser_json ↔ backend_json 요소 매칭
+화면 문서 일부만 바뀌었을 때 영향받는 요소만 다시 매칭합니다.
+
+KIWUME: compare_cache 증분 갱신용
+"""
+
+import hashlib
+
+import orjson
+
+NO_DESCRIPTION = "설명 없음"
+
+
+def content_hash(obj) -> str:
+    """키 순서와 무관한 JSON 내용 해시"""
+    return hashlib.sha1(orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def index_backend(backend_json: dict):
+    """
+    backend 요소를 매칭 순서대로 펼치고, label별 등장 위치를 기록
+
+    Returns:
+        entries: [(component 순번, label, description), ...]
+        occurrences: label → ((component 순번, component 내 순번, description), ...)
+    """
+    entries = []
+    occurrences: dict[str, list] = {}
+    for ci, comp in enumerate(backend_json.get("components", [])):
+        for ei, be in enumerate(comp.get("elements", [])):
+            label = be["element_label"].lower()
+            desc = be["description"]
+            entries.append((ci, label, desc))
+            occurrences.setdefault(label, []).append((ci, ei, desc))
+    return entries, {k: tuple(v) for k, v in occurrences.items()}
+
+
+def match_description(tag: str, entries: list) -> str:
+    """
+    tag에 element_label이 포함된 첫 backend 요소의 description
+    (한 component에서 찾은 description이 비어 있으면 다음 component부터 계속 탐색)
+    """
+    tag = tag.lower()
+    skip_component = None
+    for ci, label, desc in entries:
+        if ci == skip_component:
+            continue
+        if label in tag:
+            if desc:
+                return desc
+            skip_component = ci
+    return NO_DESCRIPTION
+
+
+def iter_compare(parser_json: dict, backend_json: dict):
+    """매칭된 요소를 parser 순서대로 하나씩 생성 (NDJSON 스트리밍용)"""
+    entries, _ = index_backend(backend_json)
+    for el in parser_json.get("elements", []):
+        yield {
+            "tag": el.get("tag"),
+            "attrs": el.get("attrs"),
+            "description": match_description(el.get("tag", ""), entries),
+        }
+
+
+def compare_documents(parser_json: dict, backend_json: dict) -> dict:
+    """parser 요소마다 element_label이 tag에 포함되는 첫 backend 설명을 매칭"""
+    return {"screen": parser_json.get("screen"), "elements": list(iter_compare(parser_json, backend_json))}
+
+
+class ScreenCompare:
+    """
+    화면 하나의 compare 결과와 의존성 정보
+
+    각 parser 요소는 (tag, attrs) 해시로, 각 backend label은 등장 위치와
+    description으로 추적한다. 요소의 매칭 결과는 tag에 포함된 label에만
+    의존하므로, 바뀐 label을 포함하는 요소와 새 요소만 다시 매칭한다.
+    `result`는 compare_cache에 그대로 들어가는 dict이며 항상 제자리에서 수정된다.
+    `parser_hash` / `backend_hash`는 상태를 만든 문서의 해시로, 공유 캐시의 문서와 비교해
+    다른 워커가 문서를 바꿨는지 확인하는 데 쓴다.
+    """
+
+    def __init__(self):
+        self.result = {"screen": None, "elements": []}
+        self.entries: list = []
+        self.occurrences: dict[str, tuple] = {}
+        self.element_hashes: list[str] = []
+        self.parser_hash: str | None = None
+        self.backend_hash: str | None = None
+
+    def built_from(self, parser_json: dict, backend_json: dict) -> bool:
+        """이 상태가 주어진 문서들로 만들어졌는지 여부"""
+        return self.parser_hash == content_hash(parser_json) and self.backend_hash == content_hash(backend_json)
+
+    def update(self, parser_json: dict | None = None, backend_json: dict | None = None) -> dict:
+        """
+        바뀐 문서만 넘겨 결과를 갱신
+
+        Returns:
+            {"screen", "changed": [바뀐 요소 tag], "added", "removed", "rematched"}
+        """
+        changed_labels: set[str] = set()
+        if backend_json is not None:
+            entries, occurrences = index_backend(backend_json)
+            changed_labels = {
+                label for label in self.occurrences.keys() | occurrences.keys()
+                if self.occurrences.get(label) != occurrences.get(label)
+            }
+            self.entries, self.occurrences = entries, occurrences
+            self.backend_hash = content_hash(backend_json)
+
+        old_elements = self.result["elements"]
+        if parser_json is not None:
+            raw_elements = parser_json.get("elements", [])
+            new_hashes = [content_hash([el.get("tag"), el.get("attrs")]) for el in raw_elements]
+            self.result["screen"] = parser_json.get("screen")
+            self.parser_hash = content_hash(parser_json)
+        else:
+            raw_elements = None
+            new_hashes = self.element_hashes
+
+        # 해시 → 이전 결과 (같은 tag/attrs 요소는 결과도 같음)
+        previous: dict[str, dict] = {}
+        for h, el in zip(self.element_hashes, old_elements):
+            previous.setdefault(h, el)
+
+        # 바뀐 label이 절반을 넘으면 label 검사보다 전체 재매칭이 싸다
+        rematch_all = len(changed_labels) * 2 > max(len(self.entries), 1)
+
+        new_elements = []
+        changed = []
+        rematched = 0
+        for i, h in enumerate(new_hashes):
+            el = previous.get(h)
+            if el is None:
+                src = raw_elements[i]
+                el = {"tag": src.get("tag"), "attrs": src.get("attrs"), "description": None}
+            tag = (el.get("tag") or "").lower()
+
+            if el["description"] is None or rematch_all or any(label in tag for label in changed_labels):
+                desc = match_description(tag, self.entries)
+                rematched += 1
+                if desc != el["description"]:
+                    if el["description"] is not None:
+                        changed.append(el.get("tag"))
+                    el["description"] = desc
+            new_elements.append(el)
+
+        added = sum(1 for h in new_hashes if h not in previous)
+        removed = len(set(self.element_hashes) - set(new_hashes))
+
+        # 리스트 객체는 유지하고 내용만 교체
+        old_elements[:] = new_elements
+        self.element_hashes = list(new_hashes)
+
+        return {
+            "screen": self.result["screen"],
+            "changed": changed,
+            "added": added,
+            "removed": removed,
+            "rematched": rematched,
+        }
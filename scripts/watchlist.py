@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+워치리스트 차트 지표 사전 계산
+종목별 일봉을 고정 크기 링 버퍼(deque)에 유지하고, 장중에는 주기적으로 갱신해
+/chat 이 네트워크 호출 없이 바로 읽을 수 있는 지표 스냅샷을 만들어 둡니다.
+
+공유 캐시(SCREEN_CACHE_DB)를 쓰면 lease 를 잡은 워커 하나만 차트를 받아오고,
+스냅샷을 공유 캐시에 올려 나머지 워커는 그것을 읽습니다 (워커 수만큼 폴링이 늘지 않도록).
+
+KIWUME: /chat 규칙 8 (차트 분석) 첫 질문 지연 제거용
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, time as dtime, timedelta, timezone
+
+from scripts.screen_cache import ScreenCache
+
+KST = timezone(timedelta(hours=9))
+MARKET_OPEN = dtime(9, 0)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def is_market_open(now: datetime) -> bool:
+    """평일 09:00~15:30 (KST) 여부 (공휴일은 고려하지 않음)"""
+    now = now.astimezone(KST)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def last_market_close(now: datetime) -> datetime:
+    """now 이전의 가장 최근 장 마감 시각"""
+    now = now.astimezone(KST)
+    close = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=KST)
+    if now < close:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close
+
+
+def sort_candles(candles: list[dict]) -> list[dict]:
+    """
+    봉을 오래된 것 → 최신 순으로 정렬 (모든 봉에 일자(dt)가 있을 때만, 없으면 응답 순서 그대로)
+    차트 응답은 최신 봉이 먼저 올 수 있으므로, 지표 계산과 링 버퍼 반영 모두 이 순서를 기준으로 한다.
+    """
+    if candles and all("dt" in c for c in candles):
+        return sorted(candles, key=lambda c: c["dt"])
+    return list(candles)
+
+
+class SymbolBuffer:
+    """종목 하나의 일봉 링 버퍼 + 지표 스냅샷"""
+
+    def __init__(self, code: str, maxlen: int):
+        self.code = code
+        self.candles: deque = deque(maxlen=maxlen)
+        self.snapshot: dict | None = None
+        self.updated_at = 0.0
+        self.refreshes = 0
+        self.errors = 0
+
+    def merge(self, candles: list[dict]):
+        """
+        차트 응답을 링 버퍼에 반영 (버퍼는 오래된 봉 → 최신 봉 순서)
+        일자(dt)가 있으면 응답 순서와 관계없이 일자순으로 정렬한 뒤, 마지막 봉은 교체하고 새 봉만 이어붙인다.
+        일자가 없으면 응답 순서를 그대로 믿고 최근 maxlen 개로 교체한다.
+        """
+        has_dt = bool(candles) and all("dt" in c for c in candles)
+        candles = sort_candles(candles)
+        if has_dt and self.candles and "dt" in self.candles[-1]:
+            last_dt = self.candles[-1]["dt"]
+            for candle in candles:
+                if candle["dt"] == last_dt:
+                    self.candles[-1] = candle
+                elif candle["dt"] > last_dt:
+                    self.candles.append(candle)
+                    last_dt = candle["dt"]
+            return
+        self.candles.clear()
+        self.candles.extend(candles)  # maxlen 을 넘으면 가장 오래된 봉부터 밀려남
+
+
+class WatchlistScheduler:
+    """
+    워치리스트 종목을 백그라운드 스레드에서 주기적으로 갱신
+
+    Args:
+        codes: 종목코드 목록
+        fetch: code → 차트 응답(dict) 또는 None
+        compute: 차트 응답 → 지표 dict
+        interval: 장중 갱신 주기 (초)
+        maxlen: 종목별 링 버퍼 크기 (MA120 을 위해 120 이상)
+        shared: 공유 모드 스냅샷 저장소 (None 이면 워커마다 직접 갱신)
+    """
+
+    LEASE_NAME = "watchlist"
+
+    def __init__(self, codes: list[str], fetch, compute, interval: float = 60.0, maxlen: int = 240,
+                 shared: ScreenCache | None = None):
+        self.fetch = fetch
+        self.compute = compute
+        self.interval = interval
+        self.shared = shared
+        self.is_leader = shared is None
+        self.buffers = {code: SymbolBuffer(code, maxlen) for code in codes}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def is_fresh(self, updated_at: float, now: datetime) -> bool:
+        """장중에는 2회 주기 이내, 장 밖에서는 직전 장 마감 이후에 갱신된 스냅샷만 유효"""
+        if not updated_at:
+            return False
+        if is_market_open(now):
+            return now.timestamp() - updated_at <= 2 * self.interval
+        return updated_at >= last_market_close(now).timestamp()
+
+    def snapshot(self, code: str) -> dict | None:
+        """최신 지표 스냅샷 (없거나 오래됐으면 None → 호출 측이 직접 계산)"""
+        if code not in self.buffers:
+            return None
+        if self.shared is not None:
+            entry = self.shared.get(code)
+            indicators, updated_at = (entry["indicators"], entry["updated_at"]) if entry else (None, 0.0)
+        else:
+            buf = self.buffers[code]
+            indicators, updated_at = buf.snapshot, buf.updated_at
+        if indicators is None or not self.is_fresh(updated_at, datetime.now(KST)):
+            return None
+        return indicators
+
+    def refresh(self, code: str) -> bool:
+        buf = self.buffers[code]
+        data = self.fetch(code)
+        if not data:
+            buf.errors += 1
+            return False
+        buf.merge(data.get("stk_dt_pole_chart_qry", []))
+        # 새 dict 로 통째로 교체 → 읽는 쪽은 락 없이 항상 완성된 스냅샷을 봄
+        indicators = self.compute({"stk_dt_pole_chart_qry": list(buf.candles)})
+        if not indicators:
+            buf.errors += 1
+            return False
+        buf.snapshot = indicators
+        buf.updated_at = time.time()
+        buf.refreshes += 1
+        if self.shared is not None:
+            self.shared[code] = {"indicators": indicators, "updated_at": buf.updated_at}
+        return True
+
+    def due(self, buf: SymbolBuffer, now: datetime) -> bool:
+        """장중이거나, 마지막 갱신이 직전 장 마감 전이면 갱신 (장 마감 후 종가 반영 / 다음 날 기동)"""
+        if is_market_open(now):
+            return True
+        return buf.updated_at < last_market_close(now).timestamp()
+
+    def elect(self) -> bool:
+        """공유 모드에서 갱신 담당 워커 선출 (담당 워커는 매 주기 lease 를 연장)"""
+        if self.shared is None:
+            return True
+        ttl = max(3 * self.interval, 30.0)
+        leader = self.shared.store.try_acquire(self.LEASE_NAME, self.shared.owner, ttl)
+        if leader and not self.is_leader:
+            print("📈 watchlist 갱신 담당 워커로 선출")
+            # 새로 맡았으면 이전 담당의 스냅샷 시각부터 이어서 판단
+            for code, buf in self.buffers.items():
+                entry = self.shared.get(code)
+                if entry:
+                    buf.updated_at = entry["updated_at"]
+        self.is_leader = leader
+        return leader
+
+    def run_once(self):
+        if not self.elect():
+            return
+        now = datetime.now(KST)
+        for code, buf in self.buffers.items():
+            if self._stop.is_set():
+                return
+            if not self.due(buf, now):
+                continue
+            try:
+                self.refresh(code)
+            except Exception as e:
+                buf.errors += 1
+                print(f"⚠️ watchlist refresh failed ({code}): {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="watchlist", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self.shared is not None and self.is_leader:
+            self.shared.store.release(self.LEASE_NAME, self.shared.owner)
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "interval_s": self.interval,
+            "role": "local" if self.shared is None else ("leader" if self.is_leader else "follower"),
+            "market_open": is_market_open(datetime.now(KST)),
+            "codes": {
+                code: {
+                    "candles": len(buf.candles),
+                    "ready": buf.snapshot is not None,
+                    "age_s": round(now - buf.updated_at, 1) if buf.updated_at else None,
+                    "refreshes": buf.refreshes,
+                    "errors": buf.errors,
+                }
+                for code, buf in self.buffers.items()
+            },
+        }
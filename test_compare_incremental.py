@@ -0,0 +1,116 @@
+# test_compare_incremental.py
+# ScreenCompare 증분 갱신 결과가 기존 /compare 전체 매칭과 같은지 무작위로 확인 (서버 필요 없음)
+#   python test_compare_incremental.py
+#   python -m pytest test_compare_incremental.py
+import copy
+import random
+
+from scripts.ui_compare import ScreenCompare, compare_documents
+
+LABELS = ["buy", "sell", "buy_btn", "news", "chart", "ma", "order", "quote", "btn", "tab"]
+DESCRIPTIONS = ["", "", "매수 버튼", "매도 버튼", "뉴스 카드", "차트 영역", "호가 창"]
+CASES = 2000
+
+
+def baseline_compare(parser_json, backend_json):
+    """기존 main.py /compare 매칭 로직 그대로 (비교 기준)"""
+    results = []
+    parser_elements = parser_json.get("elements", [])
+    backend_components = backend_json.get("components", [])
+
+    for el in parser_elements:
+        matched_desc = None
+        for comp in backend_components:
+            for be in comp.get("elements", []):
+                if be["element_label"].lower() in el.get("tag", "").lower():
+                    matched_desc = be["description"]
+                    break
+            if matched_desc:
+                break
+        results.append({
+            "tag": el.get("tag"),
+            "attrs": el.get("attrs"),
+            "description": matched_desc or "설명 없음"
+        })
+
+    return {"screen": parser_json.get("screen"), "elements": results}
+
+
+def random_backend(rng):
+    return {"screen": "home", "components": [
+        {"component": f"c{c}", "elements": [
+            {"element_label": rng.choice(LABELS).upper() if rng.random() < 0.2 else rng.choice(LABELS),
+             "description": rng.choice(DESCRIPTIONS)}
+            for _ in range(rng.randint(0, 4))
+        ]}
+        for c in range(rng.randint(0, 4))
+    ]}
+
+
+def random_parser_element(rng):
+    tag = "<" + "_".join(rng.sample(LABELS, rng.randint(0, 2))) + f" k{rng.randint(0, 3)}>"
+    return {"tag": tag, "attrs": {"id": rng.randint(0, 3)}}
+
+
+def random_parser(rng):
+    return {"screen": "home", "elements": [random_parser_element(rng) for _ in range(rng.randint(0, 8))]}
+
+
+def mutate_backend(rng, backend_json):
+    doc = copy.deepcopy(backend_json)
+    elements = [be for comp in doc["components"] for be in comp["elements"]]
+    action = rng.random()
+    if elements and action < 0.4:
+        rng.choice(elements)["description"] = rng.choice(DESCRIPTIONS)   # 빈 설명 포함
+    elif elements and action < 0.6:
+        rng.choice(elements)["element_label"] = rng.choice(LABELS)
+    elif doc["components"] and action < 0.8:
+        comp = rng.choice(doc["components"])
+        comp["elements"].insert(rng.randint(0, len(comp["elements"])),
+                                {"element_label": rng.choice(LABELS), "description": rng.choice(DESCRIPTIONS)})
+    else:
+        doc = random_backend(rng)
+    return doc
+
+
+def mutate_parser(rng, parser_json):
+    doc = copy.deepcopy(parser_json)
+    elements = doc["elements"]
+    action = rng.random()
+    if elements and action < 0.3:
+        elements.pop(rng.randrange(len(elements)))
+    elif action < 0.6:
+        elements.insert(rng.randint(0, len(elements)), random_parser_element(rng))
+    elif elements and action < 0.8:
+        elements.append(copy.deepcopy(rng.choice(elements)))   # 같은 tag/attrs 중복 요소
+    else:
+        rng.shuffle(elements)
+    return doc
+
+
+def test_incremental_matches_full_compare():
+    rng = random.Random(20261018)
+    for case in range(CASES):
+        parser_json, backend_json = random_parser(rng), random_backend(rng)
+        state = ScreenCompare()
+        state.update(parser_json, backend_json)
+        assert state.result == baseline_compare(parser_json, backend_json), f"case {case}: 초기 매칭"
+
+        for step in range(5):
+            which = rng.choice(["parser", "backend", "both"])
+            new_parser = mutate_parser(rng, parser_json) if which in ("parser", "both") else None
+            new_backend = mutate_backend(rng, backend_json) if which in ("backend", "both") else None
+            state.update(new_parser, new_backend)
+            parser_json = new_parser or parser_json
+            backend_json = new_backend or backend_json
+
+            expected = baseline_compare(parser_json, backend_json)
+            assert state.result == expected, f"case {case} step {step}: 증분 갱신 ({which})"
+            assert compare_documents(parser_json, backend_json) == expected, f"case {case}: compare_documents"
+            assert state.built_from(parser_json, backend_json), f"case {case}: 문서 해시"
+
+    print(f"✅ {CASES}개 시나리오에서 증분 갱신 결과가 전체 매칭과 같습니다.")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_compare()
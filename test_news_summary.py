@@ -0,0 +1,51 @@
+# test_news_summary.py
+# newsdetail 화면의 질문 중 기사 요약 캐시로 답할 질문만 골라내는지 확인 (서버 필요 없음)
+#   python test_news_summary.py
+#   python -m pytest test_news_summary.py
+from scripts.news_summary import is_summary_question
+
+# 지금 보고 있는 기사를 묻는 질문 → 캐시된 요약으로 답함
+ARTICLE_QUESTIONS = [
+    "이게 뭐야?",
+    "이건 뭔데?",
+    "이거 무슨 내용이야",
+    "이게 무슨 뜻이야?",
+    "이 기사 요약해줘",
+    "이 뉴스 쉽게 설명해줘",
+    "기사 핵심만 정리해줘",
+    "뉴스 내용 요약 좀",
+    "내용 쉽게 설명해줘",
+    "무슨 말이야?",
+    "뭔 소리야 ㅋㅋ",
+    "요약해줘",
+    "세 줄 요약 부탁해",
+    "간단히 정리해줘",
+]
+
+# 용어·종목·화면 기능 질문 → 모델이 질문 그대로 답함
+OTHER_QUESTIONS = [
+    "PER이 뭔데?",
+    "공매도 설명해줘",
+    "배당 쉽게 설명해줘",
+    "관심종목 정리해줘",
+    "이 회사 주가 전망 설명해줘",
+    "공매도가 무슨 말이야?",
+    "삼성전자 뉴스 정리해줘",
+    "글로벌 증시 설명해줘",
+    "이거 사도 돼?",
+    "이 버튼 뭐야?",
+    "뉴스 탭 어디 있어?",
+    "매수 화면으로 가줘",
+    "",
+]
+
+
+def test_is_summary_question():
+    wrong = [q for q in ARTICLE_QUESTIONS if not is_summary_question(q)]
+    wrong += [q for q in OTHER_QUESTIONS if is_summary_question(q)]
+    assert not wrong, f"잘못 분류된 질문: {wrong}"
+    print(f"✅ {len(ARTICLE_QUESTIONS) + len(OTHER_QUESTIONS)}개 질문 분류가 맞습니다.")
+
+
+if __name__ == "__main__":
+    test_is_summary_question()